@@ -1,13 +1,95 @@
+import numpy as np
 import pandas as pd
-import glob
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import copy
 import os
+from functools import lru_cache
+
+# Decision variables averaged across every lap of a run
+STRATEGY_VARIABLES = (
+    'energy_deployment',
+    'tire_management',
+    'fuel_strategy',
+    'ers_mode',
+    'overtake_aggression',
+    'defense_intensity'
+)
+
+# Per-agent stat keys, in the order they are reported
+STAT_FIELDS = (
+    'wins', 'avg_position', 'win_rate', 'total_races', 'avg_lap_time',
+    'avg_final_battery', 'avg_final_tire_life', 'avg_final_fuel'
+) + tuple(f'avg_{var}' for var in STRATEGY_VARIABLES)
+
+# Columns read from a run CSV (everything the aggregation and discovery passes touch)
+RUN_COLUMNS = (
+    'scenario_id', 'agent', 'lap', 'won', 'final_position', 'lap_time',
+    'battery_soc', 'tire_life', 'fuel_remaining'
+) + STRATEGY_VARIABLES
+
+# Narrow numeric types for the run columns: telemetry carries ~3 significant
+# digits, and sums are accumulated in float64 so means are unaffected
+RUN_COLUMN_TYPES = {
+    'lap': pa.int16(),
+    'won': pa.bool_(),
+    'final_position': pa.int8(),
+    'lap_time': pa.float32(),
+    'battery_soc': pa.float32(),
+    'tire_life': pa.float32(),
+    'fuel_remaining': pa.float32(),
+    **{var: pa.float32() for var in STRATEGY_VARIABLES},
+}
+_RUN_CSV_FORMAT = ds.CsvFileFormat(
+    convert_options=pacsv.ConvertOptions(column_types=RUN_COLUMN_TYPES)
+)
+
+# Run result files: Parquet, plus CSV from runs written before the switch
+RUN_FILE_SUFFIXES = ('.parquet', '.csv')
+
+# Final-lap columns summed per agent for the race result stats
+FINAL_STATE_COLUMNS = (
+    'won', 'final_position', 'lap_time', 'battery_soc', 'tire_life', 'fuel_remaining'
+)
 
 def get_latest_run() -> str:
-    """Get path to latest CSV file"""
-    csvs = glob.glob('runs/*.csv')
-    if not csvs:
+    """Get path to latest run results file"""
+    # Adding or replacing a run bumps the directory mtime, which invalidates the cache
+    return _latest_run(os.stat('runs').st_mtime_ns)
+
+@lru_cache(maxsize=1)
+def _latest_run(runs_mtime_ns: int) -> str:
+    # Single directory pass: one stat per entry, no intermediate path list
+    best = None
+    best_ctime = -1.0
+    with os.scandir('runs') as entries:
+        for entry in entries:
+            if not entry.name.endswith(RUN_FILE_SUFFIXES) or not entry.is_file(follow_symlinks=False):
+                continue
+            ctime = entry.stat().st_ctime
+            if ctime > best_ctime:
+                best_ctime = ctime
+                best = entry.path
+    if best is None:
         raise FileNotFoundError("No run files found")
-    return max(csvs, key=os.path.getctime)
+    return best
+
+def load_run(csv_path: str) -> pd.DataFrame:
+    """Read the analysed columns of a run file (Parquet or CSV) through a pyarrow dataset scan"""
+    # Projection happens in the scanner, so unused columns are never materialized
+    if csv_path.endswith('.parquet'):
+        table = ds.dataset(csv_path, format='parquet').to_table(columns=list(RUN_COLUMNS))
+        # Same narrow types as a CSV scan, so both sources aggregate identically
+        table = table.cast(pa.schema([
+            field.with_type(RUN_COLUMN_TYPES.get(field.name, field.type))
+            for field in table.schema
+        ]))
+    else:
+        table = ds.dataset(csv_path, format=_RUN_CSV_FORMAT).to_table(columns=list(RUN_COLUMNS))
+    # Low-cardinality string keys (agent, scenario_id) arrive as categoricals:
+    # group and count on integer codes instead of hashing strings
+    return table.to_pandas(strings_to_categorical=True, self_destruct=True)
 
 def aggregate_results(csv_path: str) -> dict:
     """Aggregate simulation results.
@@ -30,43 +112,71 @@ def aggregate_results(csv_path: str) -> dict:
         }
     }
     """
-    df = pd.read_csv(csv_path)
-
-    # Get final state for each race
-    final_states = df.groupby(['scenario_id', 'agent']).tail(1)
-
-    # Calculate stats per agent
-    stats = {}
-    total_scenarios = final_states['scenario_id'].nunique()
-
-    for agent in final_states['agent'].unique():
-        agent_data = final_states[final_states['agent'] == agent]
-
-        # Get all laps for this agent for decision variable averages
-        agent_all_laps = df[df['agent'] == agent]
-
-        stats[agent] = {
-            # Race results
-            "wins": int(agent_data['won'].sum()),
-            "avg_position": float(agent_data['final_position'].mean()),
-            "win_rate": float(agent_data['won'].sum() / total_scenarios * 100),
-            "total_races": len(agent_data),
-
-            # Performance metrics
-            "avg_lap_time": float(agent_data['lap_time'].mean()),
-
-            # Final state resources (from last lap only)
-            "avg_final_battery": float(agent_data['battery_soc'].mean()),
-            "avg_final_tire_life": float(agent_data['tire_life'].mean()),
-            "avg_final_fuel": float(agent_data['fuel_remaining'].mean()),
-
-            # Strategy decision averages (across all laps)
-            "avg_energy_deployment": float(agent_all_laps['energy_deployment'].mean()),
-            "avg_tire_management": float(agent_all_laps['tire_management'].mean()),
-            "avg_fuel_strategy": float(agent_all_laps['fuel_strategy'].mean()),
-            "avg_ers_mode": float(agent_all_laps['ers_mode'].mean()),
-            "avg_overtake_aggression": float(agent_all_laps['overtake_aggression'].mean()),
-            "avg_defense_intensity": float(agent_all_laps['defense_intensity'].mean())
-        }
+    st = os.stat(csv_path)
+    # Callers get their own copy so the cached entry can't be mutated
+    return copy.deepcopy(_aggregate_cached(csv_path, st.st_mtime_ns, st.st_size))
+
+@lru_cache(maxsize=8)
+def _aggregate_cached(csv_path: str, mtime_ns: int, size: int) -> dict:
+    return summarize_run(load_run(csv_path))
 
-    return stats
\ No newline at end of file
+def summarize_run(df: pd.DataFrame) -> dict:
+    """Aggregate an already loaded run (see aggregate_results for the shape)"""
+    if df.empty:
+        return {}
+
+    total_scenarios = df['scenario_id'].nunique()
+    agents = df['agent'].cat.categories
+    agent_codes = df['agent'].cat.codes.to_numpy()
+
+    # Get final state for each race: sort by (race, lap) and keep each race's last row.
+    # scenario_id is only categorical when it was read as strings; factorize
+    # gives integer codes for integer ids too (and reuses them for categoricals)
+    scenario_codes = pd.factorize(df['scenario_id'])[0]
+    race_key = scenario_codes.astype(np.int64) * len(agents) + agent_codes
+    order = np.lexsort((df['lap'].to_numpy(), race_key))
+    sorted_keys = race_key[order]
+    final_rows = order[np.append(sorted_keys[1:] != sorted_keys[:-1], True)]
+
+    # Race results and final state resources (from last lap only)
+    final_codes, total_races, final_sums = _sum_by_agent(
+        agent_codes[final_rows],
+        {col: df[col].to_numpy()[final_rows] for col in FINAL_STATE_COLUMNS}
+    )
+
+    # Strategy decision averages (across all laps)
+    _, lap_counts, lap_sums = _sum_by_agent(
+        agent_codes, {var: df[var].to_numpy() for var in STRATEGY_VARIABLES}
+    )
+
+    wins = final_sums['won'].astype(int)
+    stats = {
+        'wins': wins,
+        'avg_position': final_sums['final_position'] / total_races,
+        'win_rate': wins / total_scenarios * 100,
+        'total_races': total_races,
+        'avg_lap_time': final_sums['lap_time'] / total_races,
+        'avg_final_battery': final_sums['battery_soc'] / total_races,
+        'avg_final_tire_life': final_sums['tire_life'] / total_races,
+        'avg_final_fuel': final_sums['fuel_remaining'] / total_races,
+    }
+    for var in STRATEGY_VARIABLES:
+        stats[f'avg_{var}'] = lap_sums[var] / lap_counts
+
+    columns = {field: stats[field].tolist() for field in STAT_FIELDS}
+    return {
+        agent: {field: columns[field][i] for field in STAT_FIELDS}
+        for i, agent in enumerate(agents[final_codes])
+    }
+
+def _sum_by_agent(codes: np.ndarray, values: dict) -> tuple:
+    """Per-agent row counts and column sums via a stable sort and np.add.reduceat"""
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.append(True, sorted_codes[1:] != sorted_codes[:-1]))
+    counts = np.diff(np.append(starts, len(codes)))
+    sums = {
+        name: np.add.reduceat(np.asarray(vals, dtype=np.float64)[order], starts)
+        for name, vals in values.items()
+    }
+    return sorted_codes[starts], counts, sums
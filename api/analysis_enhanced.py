@@ -7,88 +7,25 @@ This module provides:
 3. Real-time playbook generation from simulation data
 """
 
-import pandas as pd
-import glob
 import os
-import json
+import orjson
+import re
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Any, Optional
-import sys
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-
-def get_latest_run() -> str:
-    """Get path to latest CSV file"""
-    csvs = glob.glob('runs/*.csv')
-    if not csvs:
-        raise FileNotFoundError("No run files found")
-    return max(csvs, key=os.path.getctime)
-
-
-def aggregate_results(csv_path: str) -> dict:
-    """
-    Aggregate simulation results.
-
-    Returns stats like:
-    {
-        "agent_name": {
-            "wins": int,
-            "avg_position": float,
-            "avg_battery": float,
-            "avg_tire_life": float,
-            "avg_fuel_remaining": float,
-            "win_rate": float,
-            "avg_energy_deployment": float,
-            "avg_tire_management": float,
-            "avg_fuel_strategy": float,
-            "avg_ers_mode": float,
-            "avg_overtake_aggression": float,
-            "avg_defense_intensity": float
-        }
-    }
-    """
-    df = pd.read_csv(csv_path)
-
-    # Get final state for each race
-    final_states = df.groupby(['scenario_id', 'agent']).tail(1)
-
-    # Calculate stats per agent
-    stats = {}
-    total_scenarios = final_states['scenario_id'].nunique()
-
-    for agent in final_states['agent'].unique():
-        agent_data = final_states[final_states['agent'] == agent]
-
-        # Get all laps for this agent for decision variable averages
-        agent_all_laps = df[df['agent'] == agent]
-
-        stats[agent] = {
-            # Race results
-            "wins": int(agent_data['won'].sum()),
-            "avg_position": float(agent_data['final_position'].mean()),
-            "win_rate": float(agent_data['won'].sum() / total_scenarios * 100),
-            "total_races": len(agent_data),
-
-            # Performance metrics
-            "avg_lap_time": float(agent_data['lap_time'].mean()),
-
-            # Final state resources (from last lap only)
-            "avg_final_battery": float(agent_data['battery_soc'].mean()),
-            "avg_final_tire_life": float(agent_data['tire_life'].mean()),
-            "avg_final_fuel": float(agent_data['fuel_remaining'].mean()),
-
-            # Strategy decision averages (across all laps)
-            "avg_energy_deployment": float(agent_all_laps['energy_deployment'].mean()),
-            "avg_tire_management": float(agent_all_laps['tire_management'].mean()),
-            "avg_fuel_strategy": float(agent_all_laps['fuel_strategy'].mean()),
-            "avg_ers_mode": float(agent_all_laps['ers_mode'].mean()),
-            "avg_overtake_aggression": float(agent_all_laps['overtake_aggression'].mean()),
-            "avg_defense_intensity": float(agent_all_laps['defense_intensity'].mean())
-        }
-
-    return stats
+# Situations a playbook condition can cover, detected in a single regex scan.
+# Each alternative is the literal substring the coverage check has always
+# looked for (no whitespace or operator variants), so labels are unchanged
+SITUATION_LABELS = ("low_battery", "early_race", "late_race", "degraded_tires", "position_based")
+_SITUATION_RE = re.compile(
+    r"(?P<low_battery>battery_soc < 30)"
+    r"|(?P<early_race>lap < 15)"
+    r"|(?P<late_race>lap > 45|lap > 50)"
+    r"|(?P<degraded_tires>tire_life < )"
+    r"|(?P<position_based>position)"
+)
+_SITUATION_BITS = {label: 1 << i for i, label in enumerate(SITUATION_LABELS)}
 
 
 def analyze_with_gemini(csv_path: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
@@ -102,6 +39,9 @@ def analyze_with_gemini(csv_path: Optional[str] = None, use_cache: bool = True)
     Returns:
         Dict with analysis results and generated playbook
     """
+    # Deferred so importing this module doesn't pay for pandas/pyarrow at startup
+    from api.analysis import aggregate_results, get_latest_run, load_run
+
     # Get CSV path
     if csv_path is None:
         csv_path = get_latest_run()
@@ -114,8 +54,7 @@ def analyze_with_gemini(csv_path: Optional[str] = None, use_cache: bool = True)
         age_seconds = time.time() - playbook_path.stat().st_mtime
         if age_seconds < 3600:  # 1 hour
             print(f"Using cached playbook (age: {age_seconds/60:.1f} minutes)")
-            with open(playbook_path) as f:
-                playbook = json.load(f)
+            playbook = orjson.loads(playbook_path.read_bytes())
 
             # Still calculate stats
             stats = aggregate_results(csv_path)
@@ -131,7 +70,9 @@ def analyze_with_gemini(csv_path: Optional[str] = None, use_cache: bool = True)
                 "csv_analyzed": csv_path
             }
 
-    # Run Gemini discovery
+    # Run Gemini discovery; playbook stays None if it is unavailable or fails
+    df = None
+    playbook = None
     try:
         print("Running Gemini AI discovery on simulation data...")
 
@@ -142,27 +83,25 @@ def analyze_with_gemini(csv_path: Optional[str] = None, use_cache: bool = True)
         api_key = os.getenv('GEMINI_API_KEY')
         if not api_key:
             print("⚠️ GEMINI_API_KEY not found, using fallback rules")
-            # Fall back to simple aggregation
-            from api.gemini import synthesize_playbook
-            stats = aggregate_results(csv_path)
-            df = pd.read_csv(csv_path)
-            playbook = synthesize_playbook(stats, df)
         else:
             # Use real Gemini discovery
             discoverer = StrategyDiscoverer(api_key)
 
             # Load data
-            df = pd.read_csv(csv_path)
+            df = load_run(csv_path)
 
             # Analyze and generate playbook
             analysis = discoverer.analyze_simulation_data(df)
             playbook_data = discoverer.synthesize_playbook(analysis)
 
+            # Distinct counts were already taken during analysis
+            metadata = analysis['simulation_metadata']
+
             # Enhance with metadata
-            playbook = {
+            discovered = {
                 "rules": playbook_data.get("rules", []),
-                "generated_at": pd.Timestamp.now().isoformat(),
-                "num_simulations": df['scenario_id'].nunique(),
+                "generated_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                "num_simulations": metadata['num_scenarios'],
                 "schema_version": "2.0",
                 "variables": [
                     "energy_deployment",
@@ -175,33 +114,36 @@ def analyze_with_gemini(csv_path: Optional[str] = None, use_cache: bool = True)
                 "generation_method": "gemini_discovery" if not playbook_data.get("fallback") else "fallback",
                 "source_data": {
                     "csv_path": csv_path,
-                    "num_scenarios": df['scenario_id'].nunique(),
-                    "num_agents": df['agent'].nunique()
+                    "num_scenarios": metadata['num_scenarios'],
+                    "num_agents": metadata['num_agents']
                 }
             }
 
-            # Save discovered playbook
-            with open(playbook_path, 'w') as f:
-                json.dump(playbook, f, indent=2)
+            # Save discovered playbook (serialized once, written to both paths)
+            playbook_bytes = orjson.dumps(
+                discovered, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            )
+            playbook_path.write_bytes(playbook_bytes)
             print(f"✅ Saved discovered playbook to {playbook_path}")
 
             # Also update main playbook for AdaptiveAI
             main_playbook_path = Path('data/playbook.json')
-            with open(main_playbook_path, 'w') as f:
-                json.dump(playbook, f, indent=2)
+            main_playbook_path.write_bytes(playbook_bytes)
             print(f"✅ Updated main playbook for AdaptiveAI")
 
-            # Calculate stats
-            stats = aggregate_results(csv_path)
+            playbook = discovered
 
     except Exception as e:
         print(f"⚠️ Gemini discovery failed: {e}")
         print("Falling back to standard analysis...")
 
-        # Fall back to simple aggregation
+    # Calculate stats (memoized per run file)
+    stats = aggregate_results(csv_path)
+
+    # Single fallback path (no API key, or discovery failed)
+    if playbook is None:
         from api.gemini import synthesize_playbook
-        stats = aggregate_results(csv_path)
-        df = pd.read_csv(csv_path)
+        # Synthesis reads only the stats; df is None unless discovery loaded the run
         playbook = synthesize_playbook(stats, df)
 
     return {
@@ -236,29 +178,22 @@ def get_playbook_metrics(playbook: Dict[str, Any]) -> Dict[str, Any]:
             "coverage_situations": []
         }
 
-    # Calculate averages
-    confidences = [r.get("confidence", 0) for r in rules]
-    uplifts = [r.get("uplift_win_pct", 0) for r in rules]
+    # Calculate averages in one pass
+    confidence_sum = 0.0
+    uplift_sum = 0.0
 
-    # Extract situation coverage
-    situations = []
+    # Extract situation coverage as a bitmask over SITUATION_LABELS
+    mask = 0
     for rule in rules:
-        condition = rule.get("condition", "")
-        if "battery_soc < 30" in condition:
-            situations.append("low_battery")
-        if "lap < 15" in condition:
-            situations.append("early_race")
-        if "lap > 45" in condition or "lap > 50" in condition:
-            situations.append("late_race")
-        if "tire_life < " in condition:
-            situations.append("degraded_tires")
-        if "position" in condition:
-            situations.append("position_based")
+        confidence_sum += rule.get("confidence", 0)
+        uplift_sum += rule.get("uplift_win_pct", 0)
+        for match in _SITUATION_RE.finditer(rule.get("condition", "")):
+            mask |= _SITUATION_BITS[match.lastgroup]
 
     return {
         "num_rules": len(rules),
-        "avg_confidence": sum(confidences) / len(confidences) if confidences else 0,
-        "avg_uplift": sum(uplifts) / len(uplifts) if uplifts else 0,
-        "coverage_situations": list(set(situations)),
+        "avg_confidence": confidence_sum / len(rules),
+        "avg_uplift": uplift_sum / len(rules),
+        "coverage_situations": [label for i, label in enumerate(SITUATION_LABELS) if mask >> i & 1],
         "generation_method": playbook.get("generation_method", "unknown")
     }
\ No newline at end of file
@@ -3,15 +3,61 @@ Game Session Manager
 Manages active game sessions with thread-safe state tracking and auto-cleanup.
 """
 
-import uuid
+import secrets
 import time
 from typing import Dict, Optional
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
 from threading import Lock
 import asyncio
-
-
-@dataclass
+import heapq
+
+
+# AI opponent roster as (agent_type, driver name)
+OPPONENT_ROSTER = (
+    ("VerstappenStyle", "Max Verstappen"),
+    ("HamiltonStyle", "Lewis Hamilton"),
+    ("AlonsoStyle", "Fernando Alonso"),
+    ("AggressiveAttacker", "Charles Leclerc"),
+    ("TireWhisperer", "Sergio Perez"),
+    ("EnergyMaximizer", "Lando Norris"),
+    ("BalancedRacer", "Oscar Piastri"),
+)
+
+# Starting player state (EQUAL START - no grid advantage)
+DEFAULT_PLAYER_KWARGS = dict(
+    position=0,  # Will be determined after first lap
+    battery_soc=100.0,
+    tire_life=100.0,
+    fuel_remaining=100.0,
+    lap_time=90.0,
+    cumulative_time=0.0,  # Equal start
+    speed=300.0,  # Starting speed (km/h)
+    gap_to_leader=0.0,  # No gap at start
+    lap_progress=0.0,  # Equal start on grid
+    energy_deployment=60.0,
+    tire_management=70.0,
+    fuel_strategy=65.0,
+    ers_mode=60.0,
+    overtake_aggression=50.0,
+    defense_intensity=50.0,
+)
+
+# Starting opponent state (EQUAL START: all cars at cumulative_time=0.0)
+DEFAULT_OPPONENT_KWARGS = dict(
+    position=0,  # Will be determined after first lap
+    lap_progress=0.0,  # Equal start on grid
+    battery_soc=100.0,
+    tire_life=100.0,
+    fuel_remaining=100.0,
+    cumulative_time=0.0,  # Equal start - no grid advantage
+    speed=300.0,  # Starting speed (km/h)
+    gap_to_leader=0.0,  # No gap at start
+    last_lap_time=90.0,
+)
+
+
+@dataclass(slots=True)
 class PlayerState:
     """Player car state"""
     position: int
@@ -33,7 +79,7 @@ class PlayerState:
     defense_intensity: float = 50.0
 
 
-@dataclass
+@dataclass(slots=True)
 class OpponentState:
     """AI opponent state"""
     name: str
@@ -49,7 +95,7 @@ class OpponentState:
     last_lap_time: float = 90.0  # Last lap time for speed calculation
 
 
-@dataclass
+@dataclass(slots=True)
 class GameState:
     """Complete game state for a session"""
     session_id: str
@@ -76,19 +122,71 @@ class GameState:
     # Race control - pause/resume mechanism for decision points
     pause_event: Optional[asyncio.Event] = None
 
-    # Metadata
-    created_at: float = field(default_factory=time.time)
-    last_updated: float = field(default_factory=time.time)
+    # Metadata (monotonic clock; only used for session age)
+    created_at: float = field(default_factory=time.monotonic)
+    last_updated: float = field(default_factory=time.monotonic)
+
+
+def _snapshot_encoder(cls):
+    """Build a flat dict encoder specialized to a dataclass's field layout"""
+    # Car states hold only scalars, so a shallow snapshot matches asdict()
+    # without its per-call field introspection and recursive deepcopy
+    names = tuple(f.name for f in fields(cls))
+    getter = attrgetter(*names)
+
+    def encode(obj) -> dict:
+        return dict(zip(names, getter(obj)))
+
+    return encode
+
+
+snapshot_player = _snapshot_encoder(PlayerState)
+snapshot_opponent = _snapshot_encoder(OpponentState)
+
+
+def snapshot_opponents(opponents: list[OpponentState]) -> list[dict]:
+    """Serialize all opponent states for a WebSocket message"""
+    return [snapshot_opponent(opp) for opp in opponents]
+
+
+# Number of lock stripes (power of two so the shard index is a mask)
+NUM_SHARDS = 16
+
+# Stale expiry entries tolerated beyond 2x the live sessions before a shard's
+# heap is rebuilt, so a shard with one or two games is not rebuilt every touch
+HEAP_COMPACT_SLACK = 32
 
 
 class GameSessionManager:
     """Manages active game sessions with thread-safe operations"""
 
     def __init__(self, max_session_age_minutes: int = 30):
-        self.sessions: Dict[str, GameState] = {}
-        self.lock = Lock()
+        # Sessions are striped across shards, each with its own lock, so
+        # concurrent games only contend when they hash to the same shard
+        self._shards: list[Dict[str, GameState]] = [{} for _ in range(NUM_SHARDS)]
+        self._locks = [Lock() for _ in range(NUM_SHARDS)]
+        # Per-shard min-heaps of (last_updated, session_id); entries go stale
+        # when a session is touched again and are skipped lazily on cleanup,
+        # or dropped when the heap is rebuilt (see _push_expiry)
+        self._expiry_heaps: list[list[tuple[float, str]]] = [[] for _ in range(NUM_SHARDS)]
         self.max_session_age = max_session_age_minutes * 60  # Convert to seconds
 
+    def _shard(self, session_id: str) -> int:
+        return hash(session_id) & (NUM_SHARDS - 1)
+
+    def _push_expiry(self, shard: int, session_id: str, game_state: GameState):
+        """Record a session's new expiry time (caller holds the shard lock)"""
+        heap = self._expiry_heaps[shard]
+        heapq.heappush(heap, (game_state.last_updated, session_id))
+
+        # Every update pushes an entry, so a live session's heap would grow by
+        # one per lap; once stale entries outnumber live ones, rebuild it from
+        # the live sessions (amortized O(1) per push)
+        sessions = self._shards[shard]
+        if len(heap) > 2 * len(sessions) + HEAP_COMPACT_SLACK:
+            heap[:] = [(state.last_updated, sid) for sid, state in sessions.items()]
+            heapq.heapify(heap)
+
     def create_session(
         self,
         player_name: str = "Player",
@@ -97,59 +195,21 @@ class GameSessionManager:
         safety_car_lap: Optional[int] = None
     ) -> str:
         """Create a new game session"""
-        session_id = str(uuid.uuid4())
+        session_id = secrets.token_hex(16)
 
         # DEMO MODE: Force rain on lap 3 for consistent demo experience
         rain_lap = 3
 
         # Initialize player state (EQUAL START - no grid advantage)
-        player = PlayerState(
-            position=0,  # Will be determined after first lap
-            battery_soc=100.0,
-            tire_life=100.0,
-            fuel_remaining=100.0,
-            lap_time=90.0,
-            cumulative_time=0.0,  # Equal start
-            speed=300.0,  # Starting speed (km/h)
-            gap_to_leader=0.0,  # No gap at start
-            lap_progress=0.0,  # Equal start on grid
-            energy_deployment=60.0,
-            tire_management=70.0,
-            fuel_strategy=65.0,
-            ers_mode=60.0,
-            overtake_aggression=50.0,
-            defense_intensity=50.0
-        )
+        player = PlayerState(**DEFAULT_PLAYER_KWARGS)
 
         # Initialize AI opponents (7 opponents) - EQUAL START
-        opponents = []
-        opponent_names = [
-            ("VerstappenStyle", "Max Verstappen"),
-            ("HamiltonStyle", "Lewis Hamilton"),
-            ("AlonsoStyle", "Fernando Alonso"),
-            ("AggressiveAttacker", "Charles Leclerc"),
-            ("TireWhisperer", "Sergio Perez"),
-            ("EnergyMaximizer", "Lando Norris"),
-            ("BalancedRacer", "Oscar Piastri")
+        # Positions will be determined naturally by lap times and strategy
+        opponents = [
+            OpponentState(name=name, agent_type=agent_type, **DEFAULT_OPPONENT_KWARGS)
+            for agent_type, name in OPPONENT_ROSTER
         ]
 
-        for i, (agent_type, name) in enumerate(opponent_names):
-            # EQUAL START: All cars start at cumulative_time=0.0
-            # Positions will be determined naturally by lap times and strategy
-            opponents.append(OpponentState(
-                name=name,
-                agent_type=agent_type,
-                position=0,  # Will be determined after first lap
-                lap_progress=0.0,  # Equal start on grid
-                battery_soc=100.0,
-                tire_life=100.0,
-                fuel_remaining=100.0,
-                cumulative_time=0.0,  # Equal start - no grid advantage
-                speed=300.0,  # Starting speed (km/h)
-                gap_to_leader=0.0,  # No gap at start
-                last_lap_time=90.0
-            ))
-
         # Create game state
         game_state = GameState(
             session_id=session_id,
@@ -164,46 +224,53 @@ class GameSessionManager:
             safety_car_lap=safety_car_lap
         )
 
-        with self.lock:
-            self.sessions[session_id] = game_state
+        shard = self._shard(session_id)
+        with self._locks[shard]:
+            self._shards[shard][session_id] = game_state
+            self._push_expiry(shard, session_id, game_state)
 
         return session_id
 
     def get_session(self, session_id: str) -> Optional[GameState]:
         """Get a game session by ID"""
-        with self.lock:
-            return self.sessions.get(session_id)
+        # Single-key dict reads are atomic under the GIL, so no lock is needed
+        return self._shards[self._shard(session_id)].get(session_id)
 
     def update_session(self, session_id: str, game_state: GameState):
         """Update a game session"""
-        with self.lock:
-            game_state.last_updated = time.time()
-            self.sessions[session_id] = game_state
+        shard = self._shard(session_id)
+        with self._locks[shard]:
+            game_state.last_updated = time.monotonic()
+            self._shards[shard][session_id] = game_state
+            self._push_expiry(shard, session_id, game_state)
 
     def delete_session(self, session_id: str):
         """Delete a game session"""
-        with self.lock:
-            self.sessions.pop(session_id, None)
+        shard = self._shard(session_id)
+        with self._locks[shard]:
+            self._shards[shard].pop(session_id, None)
 
     def cleanup_old_sessions(self):
         """Remove sessions older than max_session_age"""
-        current_time = time.time()
-        expired_sessions = []
-
-        with self.lock:
-            for session_id, state in self.sessions.items():
-                if current_time - state.last_updated > self.max_session_age:
-                    expired_sessions.append(session_id)
-
-            for session_id in expired_sessions:
-                del self.sessions[session_id]
-
-        return len(expired_sessions)
+        cutoff = time.monotonic() - self.max_session_age
+        expired_count = 0
+
+        for lock, sessions, heap in zip(self._locks, self._shards, self._expiry_heaps):
+            with lock:
+                while heap and heap[0][0] < cutoff:
+                    last_updated, session_id = heapq.heappop(heap)
+                    state = sessions.get(session_id)
+                    # Skip entries for deleted sessions or superseded timestamps
+                    if state is None or state.last_updated != last_updated:
+                        continue
+                    del sessions[session_id]
+                    expired_count += 1
+
+        return expired_count
 
     def get_active_session_count(self) -> int:
         """Get count of active sessions"""
-        with self.lock:
-            return len(self.sessions)
+        return sum(len(sessions) for sessions in self._shards)
 
 
 # Global session manager instance
@@ -1,11 +1,7 @@
-def synthesize_playbook(stats: dict, df) -> dict:
-    """Generate playbook from race data"""
-    
-    # Analyze patterns in the data to create realistic rules
-    rules = []
-    
+# Fixed fallback rules; synthesize_playbook hands out fresh copies
+FALLBACK_RULES = (
     # Rule 1: Low battery management
-    rules.append({
+    {
         "condition": "battery_soc < 30 and lap > 40",
         "rule": "Low Battery Late Race",
         "action": {
@@ -15,10 +11,9 @@ def synthesize_playbook(stats: dict, df) -> dict:
         },
         "confidence": 0.85,
         "rationale": "Conserve energy when battery is low in final laps"
-    })
-    
+    },
     # Rule 2: Rain strategy for podium positions
-    rules.append({
+    {
         "condition": "position <= 3 and rain == True",
         "rule": "Podium Position Rain",
         "action": {
@@ -28,10 +23,9 @@ def synthesize_playbook(stats: dict, df) -> dict:
         },
         "confidence": 0.75,
         "rationale": "Balanced approach in wet conditions when in podium position"
-    })
-    
+    },
     # Rule 3: Aggressive early race
-    rules.append({
+    {
         "condition": "lap < 20 and position > 5",
         "rule": "Early Race Aggression",
         "action": {
@@ -41,10 +35,9 @@ def synthesize_playbook(stats: dict, df) -> dict:
         },
         "confidence": 0.70,
         "rationale": "Push hard early to gain positions when battery is full"
-    })
-    
+    },
     # Rule 4: Conservative mid-race
-    rules.append({
+    {
         "condition": "lap >= 20 and lap <= 40 and battery_soc > 50",
         "rule": "Mid Race Conservation",
         "action": {
@@ -54,10 +47,9 @@ def synthesize_playbook(stats: dict, df) -> dict:
         },
         "confidence": 0.80,
         "rationale": "Maintain position while managing energy for final stint"
-    })
-    
+    },
     # Rule 5: Final push for leaders
-    rules.append({
+    {
         "condition": "position <= 2 and lap > 45 and battery_soc > 20",
         "rule": "Leader Final Push",
         "action": {
@@ -67,7 +59,15 @@ def synthesize_playbook(stats: dict, df) -> dict:
         },
         "confidence": 0.90,
         "rationale": "Maximum attack when leading in final laps with sufficient energy"
-    })
+    },
+)
+
+
+def synthesize_playbook(stats: dict, df) -> dict:
+    """Generate playbook from race data"""
+    
+    # Copy the shared rule templates so callers can mutate the result freely
+    rules = [{**rule, "action": dict(rule["action"])} for rule in FALLBACK_RULES]
     
     return {
         "rules": rules,
@@ -8,16 +8,445 @@ This module implements genuine AI strategy discovery by:
 3. Generating playbooks with confidence scores and performance metrics
 """
 
-import json
+import orjson
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
 import time
-import re
+import hashlib
+from datetime import datetime, timedelta, timezone
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+# On-disk cache of parsed Gemini playbooks, keyed by a hash of model + prompt
+RESPONSE_CACHE_DIR = Path('data/gemini_cache')
+
+# Worker threads for blocking Gemini calls when the SDK has no async API;
+# sized to the default asynthesize_many concurrency
+_GEMINI_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='gemini')
+
+# Static part of the synthesis prompt; only the SIMULATION DATA payload varies
+# between calls, so this prefix is what gets context-cached when enabled
+SYNTHESIS_INSTRUCTIONS = """You are an F1 strategy expert analyzing simulation data from 2026 regulations.
+The 2026 F1 cars have 3x more electric power (350kW vs 120kW), creating a 50/50 ICE/Electric split.
+
+I have simulation data comparing winning vs losing strategies. Please analyze the patterns and generate
+specific, actionable strategic rules.
+
+The SIMULATION DATA is provided after these instructions.
+
+Based on the simulation data, generate 5-7 strategic rules for optimal performance. Each rule should:
+1. Have a clear condition (when to apply it)
+2. Specify exact action values for the 6 strategic variables
+3. Include a confidence score (0.0-1.0) based on data support
+4. Provide a brief rationale explaining why it works
+
+IMPORTANT: Generate rules that reflect the actual patterns in the data, not generic F1 wisdom.
+Focus on situations where winners significantly outperform losers.
+
+Return ONLY a valid JSON object (no markdown backticks) in this exact format:
+{
+  "rules": [
+    {
+      "rule": "Short descriptive name",
+      "condition": "battery_soc < 30 and lap > 40",
+      "action": {
+        "energy_deployment": 25,
+        "tire_management": 60,
+        "fuel_strategy": 45,
+        "ers_mode": 15,
+        "overtake_aggression": 40,
+        "defense_intensity": 80
+      },
+      "confidence": 0.85,
+      "uplift_win_pct": 15.2,
+      "rationale": "Brief explanation of why this works based on the data"
+    }
+  ]
+}
+
+Make sure:
+- Conditions use only these variables: battery_soc, lap, position, tire_life, tire_age, fuel_remaining
+- All action values are between 0-100
+- Confidence reflects the sample size and performance difference
+- Uplift is realistic (typically 5-30%)
+"""
+
+# Row condition bits packed by analyze_simulation_data
+LOW_BATTERY_BIT = 1 << 0      # battery_soc < 30
+EARLY_RACE_BIT = 1 << 1       # lap < 15
+LATE_RACE_BIT = 1 << 2        # lap > 40
+DEGRADED_TIRES_BIT = 1 << 3   # tire_life < 40
+
+# Situational patterns compared between winners and losers:
+# (name, required condition bits, strategy columns reported)
+SITUATIONS = (
+    # 1. Low battery situations (battery < 30 in late race)
+    ('low_battery_late_race',
+     LOW_BATTERY_BIT | LATE_RACE_BIT,
+     ['energy_deployment', 'ers_mode', 'tire_management']),
+    # 2. Early race aggression (lap < 15)
+    ('early_race',
+     EARLY_RACE_BIT,
+     ['energy_deployment', 'overtake_aggression', 'tire_management']),
+    # 3. Tire degradation (tire_life < 40)
+    ('degraded_tires',
+     DEGRADED_TIRES_BIT,
+     ['tire_management', 'energy_deployment', 'overtake_aggression']),
+)
+PATTERN_COLUMNS = ['energy_deployment', 'ers_mode', 'tire_management', 'overtake_aggression']
+
+# Per-agent race-result reductions over each agent's final laps
+STAT_AGGREGATIONS = [
+    ('won', 'sum'),
+    ('final_position', 'mean'),
+    ('lap_time', 'mean'),
+    ('energy_deployment', 'mean'),
+    ('tire_management', 'mean'),
+    ('fuel_strategy', 'mean'),
+    ('ers_mode', 'mean'),
+    ('overtake_aggression', 'mean'),
+    ('defense_intensity', 'mean')
+]
+FINAL_LAP_COLUMNS = ['scenario_id', 'agent'] + [col for col, _ in STAT_AGGREGATIONS]
+
+# Finished discovery playbooks, keyed by the source CSV's path, size and mtime
+PIPELINE_CACHE_DIR = Path('data/.cache')
+
+# Columns and narrow types read from the discovery CSV (everything the
+# analysis touches); agent names arrive dictionary-encoded, i.e. categorical
+DISCOVERY_COLUMN_TYPES = {
+    'scenario_id': pa.int32(),
+    'agent': pa.dictionary(pa.int32(), pa.string()),
+    'lap': pa.int16(),
+    'won': pa.bool_(),
+    'final_position': pa.int8(),
+    'lap_time': pa.float32(),
+    'battery_soc': pa.float32(),
+    'tire_life': pa.float32(),
+    'energy_deployment': pa.float32(),
+    'tire_management': pa.float32(),
+    'fuel_strategy': pa.float32(),
+    'ers_mode': pa.float32(),
+    'overtake_aggression': pa.float32(),
+    'defense_intensity': pa.float32(),
+}
+
+# Bytes per streamed CSV block: bounds peak memory independently of file size
+CSV_BLOCK_SIZE = 64 << 20
+
+# Roughly the median synthesis latency: an async call still running after
+# this long gets a hedged duplicate request
+HEDGE_DELAY_SECS = 3.0
+
+# Lifetime of the server-side instructions cache (opt-in via GEMINI_CONTEXT_CACHE=true)
+CONTEXT_CACHE_TTL = timedelta(hours=1)
+
+
+class RuleAction(BaseModel):
+    """Strategy values a rule sets; each is on the 0-100 scale"""
+    energy_deployment: float = Field(ge=0, le=100)
+    tire_management: float = Field(ge=0, le=100)
+    fuel_strategy: float = Field(ge=0, le=100)
+    ers_mode: float = Field(ge=0, le=100)
+    overtake_aggression: float = Field(ge=0, le=100)
+    defense_intensity: float = Field(ge=0, le=100)
+
+
+class PlaybookRule(BaseModel):
+    """One synthesized rule; extra keys from the model are kept"""
+    model_config = ConfigDict(extra='allow')
+
+    rule: str
+    condition: str
+    action: RuleAction
+    confidence: float = Field(ge=0, le=1)
+    uplift_win_pct: float = 0.0
+    rationale: str = ''
+
+
+class Playbook(BaseModel):
+    """Schema a Gemini playbook response must satisfy"""
+    model_config = ConfigDict(extra='allow')
+
+    rules: List[PlaybookRule]
+
+
+@lru_cache(maxsize=None)
+def configure_gemini(api_key: str) -> None:
+    """Configure the SDK for a key once; repeat calls are no-ops"""
+    genai.configure(api_key=api_key)
+
+
+@lru_cache(maxsize=None)
+def shared_model(api_key: str) -> genai.GenerativeModel:
+    """
+    Process-wide model for a key.
+
+    The model creates its API client on first use and keeps it, so sharing
+    one instance across StrategyDiscoverer objects and retries reuses the
+    open connection instead of re-handshaking.
+    """
+    configure_gemini(api_key)
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+
+class JsonObjectScanner:
+    """
+    Incrementally tracks brace depth over streamed text.
+
+    feed() returns True once the first top-level JSON object has closed, so a
+    streamed Gemini response can stop being read as soon as the playbook is
+    complete instead of waiting for any trailing commentary.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+        self.complete = False
+        # Offsets into the concatenation of all fed text: the object's opening
+        # brace and one past its closing brace
+        self.start = None
+        self.end = None
+        self.offset = 0
+
+    def feed(self, text: str) -> bool:
+        if self.complete:
+            return True
+        for i, ch in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '{':
+                if not self.started:
+                    self.started = True
+                    self.start = self.offset + i
+                self.depth += 1
+            elif not self.started:
+                continue
+            elif ch == '"':
+                self.in_string = True
+            elif ch == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    self.complete = True
+                    self.end = self.offset + i + 1
+                    return True
+        self.offset += len(text)
+        return False
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """First balanced top-level JSON object in text, found in one linear scan"""
+    scanner = JsonObjectScanner()
+    if scanner.feed(text):
+        return text[scanner.start:scanner.end]
+    return None
+
+
+class StatsAccumulator:
+    """
+    Online sufficient statistics behind analyze_simulation_data.
+
+    update() consumes lap rows in file order, in chunks of any size;
+    finalize() builds the analysis dict. Only the last row seen for each race
+    and per-agent situational sums are kept, so memory grows with the number
+    of races and agents rather than lap rows, and discovery files larger
+    than RAM can be streamed.
+    """
+
+    def __init__(self):
+        self.total_laps = 0
+        self.agent_index: Dict[Any, int] = {}
+        # (situation, agent, feature) sums and (situation, agent) row counts
+        self.situation_sums = np.zeros((len(SITUATIONS), 0, len(PATTERN_COLUMNS)))
+        self.situation_counts = np.zeros((len(SITUATIONS), 0), dtype=np.int64)
+        self.final_lap_chunks: List[pd.DataFrame] = []
+
+    def update(self, chunk: pd.DataFrame):
+        """Fold a chunk of lap rows into the running statistics"""
+        self.total_laps += len(chunk)
+        codes = self._agent_codes(chunk['agent'])
+        num_agents = len(self.agent_index)
+
+        # Every row condition is packed once into a uint8 bitboard; each
+        # situation is then a single AND-and-compare against its bit pattern
+        # (bits are ORed in place into the first comparison's buffer, so the
+        # only temporaries are one predicate array at a time)
+        lap = chunk['lap'].to_numpy()
+        flags = (chunk['battery_soc'].to_numpy() < 30).view(np.uint8)
+        flags |= (lap < 15).view(np.uint8) << 1
+        flags |= (lap > 40).view(np.uint8) << 2
+        flags |= (chunk['tire_life'].to_numpy() < 40).view(np.uint8) << 3
+
+        # Strategy values are 0-100 and reported to 2 decimals, so the slab is
+        # float32; the loaders already deliver float32 columns
+        features = chunk[PATTERN_COLUMNS].to_numpy(dtype=np.float32)
+
+        # Rows of situation s are keyed s * num_agents + agent, so one
+        # bincount per feature sums every (situation, agent) cell at once
+        keys = []
+        rows = []
+        for s, (_, bits, _) in enumerate(SITUATIONS):
+            selected = np.flatnonzero((flags & bits) == bits)
+            keys.append(codes[selected] + s * num_agents)
+            rows.append(selected)
+        key = np.concatenate(keys)
+        picked = features[np.concatenate(rows)]
+        cells = len(SITUATIONS) * num_agents
+        self.situation_counts += np.bincount(key, minlength=cells).reshape(len(SITUATIONS), num_agents)
+        self.situation_sums += np.stack([
+            np.bincount(key, weights=picked[:, f], minlength=cells)
+            for f in range(len(PATTERN_COLUMNS))
+        ], axis=1).reshape(len(SITUATIONS), num_agents, len(PATTERN_COLUMNS))
+
+        # Last row of each race within this chunk (a single hashed pass, same
+        # rows as groupby(...).tail(1)); rows from later chunks supersede these
+        last_rows = ~chunk.duplicated(['scenario_id', 'agent'], keep='last').to_numpy()
+        self.final_lap_chunks.append(chunk.loc[last_rows, FINAL_LAP_COLUMNS])
+
+    def _agent_codes(self, agents: pd.Series) -> np.ndarray:
+        """Map a chunk's agent names to stable codes, growing the per-agent arrays"""
+        local_codes, uniques = pd.factorize(agents)
+        global_codes = np.array(
+            [self.agent_index.setdefault(name, len(self.agent_index)) for name in uniques],
+            dtype=np.intp
+        )
+        grow = len(self.agent_index) - self.situation_counts.shape[1]
+        if grow:
+            self.situation_counts = np.pad(self.situation_counts, ((0, 0), (0, grow)))
+            self.situation_sums = np.pad(self.situation_sums, ((0, 0), (0, grow), (0, 0)))
+        return global_codes[local_codes]
+
+    def finalize(self) -> Dict[str, Any]:
+        """Build the analysis dict from the accumulated statistics"""
+        # Get race-level results (final lap of each agent in each scenario)
+        final_laps = pd.concat(self.final_lap_chunks, ignore_index=True)
+        final_laps = final_laps[~final_laps.duplicated(['scenario_id', 'agent'], keep='last').to_numpy()]
+
+        # Distinct counts come from the one-row-per-race frame (laps x fewer
+        # rows to hash than the lap rows) and are reused for win_rate and the metadata
+        num_scenarios = final_laps['scenario_id'].nunique()
+        num_agents_total = final_laps['agent'].nunique()
+
+        # Calculate agent performance metrics: one Arrow hash aggregation
+        # computes every per-agent reduction in a single pass over the groups
+        stat_columns = [col for col, _ in STAT_AGGREGATIONS]
+        agent_stats = (
+            pa.Table.from_pandas(final_laps[['agent'] + stat_columns], preserve_index=False)
+            .group_by('agent')
+            .aggregate(STAT_AGGREGATIONS)
+            .to_pandas()
+            .set_index('agent')
+        )
+        # Arrow names outputs '<col>_<agg>'; restore the plain column names
+        agent_stats = agent_stats[[f'{col}_{agg}' for col, agg in STAT_AGGREGATIONS]]
+        agent_stats.columns = stat_columns
+
+        # Identify top performers (top 25%)
+        num_agents = len(agent_stats)
+        top_cutoff = int(num_agents * 0.25)
+        bottom_cutoff = int(num_agents * 0.75)
+
+        agent_stats['win_rate'] = agent_stats['won'] / num_scenarios
+        # Arrow emits groups in first-appearance order; start from agent-name
+        # order (what a pandas groupby gives) and sort stably, so win-rate ties
+        # split across the top/bottom cutoffs the same way on every run
+        agent_stats.index = agent_stats.index.astype(str)
+        agent_stats = agent_stats.sort_index().sort_values('win_rate', ascending=False, kind='stable')
+
+        top_agents = agent_stats.head(top_cutoff)
+        bottom_agents = agent_stats.tail(num_agents - bottom_cutoff)
+
+        # Analyze situational patterns
+        patterns = {}
+
+        # Top-25% mask indexed by agent code; winner (top) and loser (everyone
+        # else) sums are then reductions over agent cells instead of another
+        # pass over the lap rows
+        is_winner = np.zeros(len(self.agent_index), dtype=bool)
+        is_winner[[self.agent_index[name] for name in top_agents.index]] = True
+
+        group_sums = np.concatenate([
+            self.situation_sums[:, is_winner].sum(axis=1),
+            self.situation_sums[:, ~is_winner].sum(axis=1)
+        ])
+        group_counts = np.concatenate([
+            self.situation_counts[:, is_winner].sum(axis=1),
+            self.situation_counts[:, ~is_winner].sum(axis=1)
+        ])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # An empty group divides 0 by 0 -> NaN, matching an empty mean
+            group_means = group_sums / group_counts[:, None]
+        sample_sizes = self.situation_counts.sum(axis=1)
+
+        column_index = {col: i for i, col in enumerate(PATTERN_COLUMNS)}
+        num_situations = len(SITUATIONS)
+        for i, (name, _, columns) in enumerate(SITUATIONS):
+            if sample_sizes[i] > 0:
+                idx = [column_index[col] for col in columns]
+                patterns[name] = {
+                    'winner_strategy': dict(zip(columns, group_means[i, idx].tolist())),
+                    'loser_strategy': dict(zip(columns, group_means[num_situations + i, idx].tolist())),
+                    'sample_size': int(sample_sizes[i])
+                }
+
+        # Group means for the summary: one column-wise mean over each group's
+        # ndarray slab, zipped to dicts, instead of one Series mean per value
+        profile_columns = [
+            'energy_deployment', 'tire_management', 'fuel_strategy',
+            'ers_mode', 'overtake_aggression', 'defense_intensity'
+        ]
+        summary_columns = ['win_rate', 'final_position'] + profile_columns
+
+        def summarize_group(group: pd.DataFrame) -> Dict[str, Any]:
+            values = group[summary_columns].to_numpy(dtype=np.float64, copy=True)
+            # Per-agent stats are reported to 2 decimals before they are
+            # averaged; only this group's rows are rounded rather than the
+            # whole agent table (win_rate was never rounded)
+            np.round(values[:, 1:], 2, out=values[:, 1:])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                # An empty group divides 0 by 0 -> NaN, matching an empty Series mean
+                means = (values.sum(axis=0) / len(group)).tolist()
+            return {
+                'agents': group.index.tolist(),
+                'avg_win_rate': means[0],
+                'avg_position': means[1],
+                'strategy_profile': dict(zip(profile_columns, means[2:]))
+            }
+
+        # Build analysis summary for Gemini
+        analysis = {
+            'simulation_metadata': {
+                'num_scenarios': num_scenarios,
+                'num_agents': num_agents_total,
+                'total_laps': self.total_laps,
+                'physics_version': '2026_extrapolated'
+            },
+            'performance_groups': {
+                'top_25_percent': summarize_group(top_agents),
+                'bottom_25_percent': summarize_group(bottom_agents)
+            },
+            'situational_patterns': patterns
+        }
+
+        return analysis
 
 
 class StrategyDiscoverer:
@@ -47,137 +476,85 @@ class StrategyDiscoverer:
                 "2. Pass api_key parameter to StrategyDiscoverer()"
             )
 
-        # Configure Gemini
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        # Configure Gemini (once per key per process)
+        configure_gemini(self.api_key)
+        use_context_cache = os.getenv('GEMINI_CONTEXT_CACHE', 'false').lower() == 'true'
+        self.context_cache = self._create_context_cache() if use_context_cache else None
+        if self.context_cache is not None:
+            self.model = genai.GenerativeModel.from_cached_content(cached_content=self.context_cache)
+        else:
+            self.model = shared_model(self.api_key)
+
+        # Identical prompts (re-running discovery on the same data) are served from disk
+        self.cache_stats = {'hits': 0, 'misses': 0}
 
         print(f"✅ Gemini API configured (key: {self.api_key[:8]}...)")
 
-    def analyze_simulation_data(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def analyze_simulation_csv(self, csv_path: str) -> Dict[str, Any]:
         """
-        Analyze simulation results to extract patterns for Gemini.
+        Analyze a simulation CSV without loading it whole.
+
+        Blocks of CSV_BLOCK_SIZE bytes are parsed (multithreaded, only the
+        analysed columns, typed up front) and folded into a StatsAccumulator,
+        so peak memory is bounded by the block size plus per-race state.
 
         Args:
-            df: DataFrame with simulation results
+            csv_path: Path to simulation results CSV
 
         Returns:
             Dict with performance groups and patterns
         """
-        print("Analyzing simulation data...")
-
-        # Get race-level results (final lap of each agent in each scenario)
-        final_laps = df.groupby(['scenario_id', 'agent']).tail(1)
-
-        # Calculate agent performance metrics
-        agent_stats = final_laps.groupby('agent').agg({
-            'won': 'sum',
-            'final_position': 'mean',
-            'lap_time': 'mean',
-            'energy_deployment': 'mean',
-            'tire_management': 'mean',
-            'fuel_strategy': 'mean',
-            'ers_mode': 'mean',
-            'overtake_aggression': 'mean',
-            'defense_intensity': 'mean'
-        }).round(2)
-
-        # Identify top performers (top 25%)
-        num_agents = len(agent_stats)
-        top_cutoff = int(num_agents * 0.25)
-        bottom_cutoff = int(num_agents * 0.75)
-
-        agent_stats['win_rate'] = agent_stats['won'] / final_laps['scenario_id'].nunique()
-        agent_stats = agent_stats.sort_values('win_rate', ascending=False)
-
-        top_agents = agent_stats.head(top_cutoff)
-        bottom_agents = agent_stats.tail(num_agents - bottom_cutoff)
-        middle_agents = agent_stats.iloc[top_cutoff:bottom_cutoff]
+        reader = pacsv.open_csv(
+            csv_path,
+            read_options=pacsv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=list(DISCOVERY_COLUMN_TYPES),
+                column_types=DISCOVERY_COLUMN_TYPES
+            )
+        )
+        accumulator = StatsAccumulator()
+        for batch in reader:
+            accumulator.update(batch.to_pandas())
+        return accumulator.finalize()
 
-        # Analyze situational patterns
-        patterns = {}
+    def _create_context_cache(self):
+        """
+        Cache SYNTHESIS_INSTRUCTIONS server-side for CONTEXT_CACHE_TTL.
 
-        # 1. Low battery situations (battery < 30 in late race)
-        low_battery_df = df[(df['battery_soc'] < 30) & (df['lap'] > 40)]
-        if len(low_battery_df) > 0:
-            winners_mask = low_battery_df['agent'].isin(top_agents.index)
-            patterns['low_battery_late_race'] = {
-                'winner_strategy': low_battery_df[winners_mask][
-                    ['energy_deployment', 'ers_mode', 'tire_management']
-                ].mean().to_dict(),
-                'loser_strategy': low_battery_df[~winners_mask][
-                    ['energy_deployment', 'ers_mode', 'tire_management']
-                ].mean().to_dict(),
-                'sample_size': len(low_battery_df)
-            }
+        Returns None (plain prompts are sent) if the installed SDK has no
+        caching API or the cache cannot be created, e.g. when the prefix is
+        below the model's minimum cacheable token count.
+        """
+        if not hasattr(genai, 'caching'):
+            print("⚠️ Installed google-generativeai has no context caching, sending full prompts")
+            return None
+        try:
+            cache = genai.caching.CachedContent.create(
+                model=f'models/{GEMINI_MODEL}',
+                system_instruction=SYNTHESIS_INSTRUCTIONS,
+                ttl=CONTEXT_CACHE_TTL
+            )
+        except Exception as e:
+            print(f"⚠️ Could not create Gemini context cache, sending full prompts: {e}")
+            return None
+        print(f"✅ Synthesis instructions context-cached for {CONTEXT_CACHE_TTL}")
+        return cache
 
-        # 2. Early race aggression (lap < 15)
-        early_race_df = df[df['lap'] < 15]
-        if len(early_race_df) > 0:
-            winners_mask = early_race_df['agent'].isin(top_agents.index)
-            patterns['early_race'] = {
-                'winner_strategy': early_race_df[winners_mask][
-                    ['energy_deployment', 'overtake_aggression', 'tire_management']
-                ].mean().to_dict(),
-                'loser_strategy': early_race_df[~winners_mask][
-                    ['energy_deployment', 'overtake_aggression', 'tire_management']
-                ].mean().to_dict(),
-                'sample_size': len(early_race_df)
-            }
+    def analyze_simulation_data(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Analyze simulation results to extract patterns for Gemini.
 
-        # 3. Tire degradation (tire_life < 40)
-        degraded_tires_df = df[df['tire_life'] < 40]
-        if len(degraded_tires_df) > 0:
-            winners_mask = degraded_tires_df['agent'].isin(top_agents.index)
-            patterns['degraded_tires'] = {
-                'winner_strategy': degraded_tires_df[winners_mask][
-                    ['tire_management', 'energy_deployment', 'overtake_aggression']
-                ].mean().to_dict(),
-                'loser_strategy': degraded_tires_df[~winners_mask][
-                    ['tire_management', 'energy_deployment', 'overtake_aggression']
-                ].mean().to_dict(),
-                'sample_size': len(degraded_tires_df)
-            }
+        Args:
+            df: DataFrame with simulation results
 
-        # Build analysis summary for Gemini
-        analysis = {
-            'simulation_metadata': {
-                'num_scenarios': df['scenario_id'].nunique(),
-                'num_agents': df['agent'].nunique(),
-                'total_laps': len(df),
-                'physics_version': '2026_extrapolated'
-            },
-            'performance_groups': {
-                'top_25_percent': {
-                    'agents': top_agents.index.tolist(),
-                    'avg_win_rate': float(top_agents['win_rate'].mean()),
-                    'avg_position': float(top_agents['final_position'].mean()),
-                    'strategy_profile': {
-                        'energy_deployment': float(top_agents['energy_deployment'].mean()),
-                        'tire_management': float(top_agents['tire_management'].mean()),
-                        'fuel_strategy': float(top_agents['fuel_strategy'].mean()),
-                        'ers_mode': float(top_agents['ers_mode'].mean()),
-                        'overtake_aggression': float(top_agents['overtake_aggression'].mean()),
-                        'defense_intensity': float(top_agents['defense_intensity'].mean())
-                    }
-                },
-                'bottom_25_percent': {
-                    'agents': bottom_agents.index.tolist(),
-                    'avg_win_rate': float(bottom_agents['win_rate'].mean()),
-                    'avg_position': float(bottom_agents['final_position'].mean()),
-                    'strategy_profile': {
-                        'energy_deployment': float(bottom_agents['energy_deployment'].mean()),
-                        'tire_management': float(bottom_agents['tire_management'].mean()),
-                        'fuel_strategy': float(bottom_agents['fuel_strategy'].mean()),
-                        'ers_mode': float(bottom_agents['ers_mode'].mean()),
-                        'overtake_aggression': float(bottom_agents['overtake_aggression'].mean()),
-                        'defense_intensity': float(bottom_agents['defense_intensity'].mean())
-                    }
-                }
-            },
-            'situational_patterns': patterns
-        }
+        Returns:
+            Dict with performance groups and patterns
+        """
+        print("Analyzing simulation data...")
 
-        return analysis
+        accumulator = StatsAccumulator()
+        accumulator.update(df)
+        return accumulator.finalize()
 
     def synthesize_playbook(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -192,85 +569,205 @@ class StrategyDiscoverer:
         print("Calling Gemini API for pattern synthesis...")
 
         # Construct prompt for Gemini
-        prompt = f"""You are an F1 strategy expert analyzing simulation data from 2026 regulations.
-The 2026 F1 cars have 3x more electric power (350kW vs 120kW), creating a 50/50 ICE/Electric split.
-
-I have simulation data comparing winning vs losing strategies. Please analyze the patterns and generate
-specific, actionable strategic rules.
-
-SIMULATION DATA:
-{json.dumps(analysis, indent=2)}
-
-Based on this data, generate 5-7 strategic rules for optimal performance. Each rule should:
-1. Have a clear condition (when to apply it)
-2. Specify exact action values for the 6 strategic variables
-3. Include a confidence score (0.0-1.0) based on data support
-4. Provide a brief rationale explaining why it works
-
-IMPORTANT: Generate rules that reflect the actual patterns in the data, not generic F1 wisdom.
-Focus on situations where winners significantly outperform losers.
-
-Return ONLY a valid JSON object (no markdown backticks) in this exact format:
-{{
-  "rules": [
-    {{
-      "rule": "Short descriptive name",
-      "condition": "battery_soc < 30 and lap > 40",
-      "action": {{
-        "energy_deployment": 25,
-        "tire_management": 60,
-        "fuel_strategy": 45,
-        "ers_mode": 15,
-        "overtake_aggression": 40,
-        "defense_intensity": 80
-      }},
-      "confidence": 0.85,
-      "uplift_win_pct": 15.2,
-      "rationale": "Brief explanation of why this works based on the data"
-    }}
-  ]
-}}
-
-Make sure:
-- Conditions use only these variables: battery_soc, lap, position, tire_life, tire_age, fuel_remaining
-- All action values are between 0-100
-- Confidence reflects the sample size and performance difference
-- Uplift is realistic (typically 5-30%)
-"""
+        prompt = self._build_synthesis_prompt(analysis)
+
+        # Serve byte-identical prompts from the response cache
+        cache_path = self._cache_path(prompt)
+        cached = self._read_cached_playbook(cache_path)
+        if cached is not None:
+            self.cache_stats['hits'] += 1
+            print(f"✅ Using cached Gemini response ({len(cached['rules'])} rules)")
+            return cached
+        self.cache_stats['misses'] += 1
+        request = self._synthesis_request(analysis, prompt)
 
         # Make API call with retry logic
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                response = self.model.generate_content(prompt)
-                raw_response = response.text
+                raw_response = self._generate_streamed_text(request)
+                playbook_data = self._parse_playbook_response(raw_response)
+                self._write_cached_playbook(cache_path, playbook_data)
+                return playbook_data
 
-                # Extract JSON from response (handle markdown wrappers)
-                json_match = re.search(r'(\{[\s\S]*\})', raw_response)
-                if json_match:
-                    json_str = json_match.group(1)
+            except Exception as e:
+                print(f"Attempt {attempt + 1} failed: {e}")
+                if attempt < max_retries - 1:
+                    time.sleep(2 ** attempt)  # Exponential backoff
                 else:
-                    # Try to clean common wrapper patterns
-                    json_str = raw_response.replace('```json', '').replace('```', '').strip()
+                    print("⚠️ Gemini API failed, using fallback rules")
+                    return self._generate_fallback_playbook(analysis)
 
-                # Parse JSON
-                playbook_data = json.loads(json_str)
+    async def asynthesize_playbook(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of synthesize_playbook.
+
+        Awaits the Gemini call instead of blocking, so several syntheses can
+        share one event loop. Slow calls are hedged (see _hedged_playbook);
+        caching, retries and fallback match the sync path.
+        """
+        prompt = self._build_synthesis_prompt(analysis)
 
-                # Validate structure
-                if 'rules' not in playbook_data:
-                    raise ValueError("Response missing 'rules' key")
+        cache_path = self._cache_path(prompt)
+        cached = self._read_cached_playbook(cache_path)
+        if cached is not None:
+            self.cache_stats['hits'] += 1
+            return cached
+        self.cache_stats['misses'] += 1
+        request = self._synthesis_request(analysis, prompt)
 
-                print(f"✅ Gemini generated {len(playbook_data['rules'])} rules")
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                playbook_data = await self._hedged_playbook(request)
+                self._write_cached_playbook(cache_path, playbook_data)
                 return playbook_data
 
             except Exception as e:
                 print(f"Attempt {attempt + 1} failed: {e}")
                 if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
+                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
                 else:
                     print("⚠️ Gemini API failed, using fallback rules")
                     return self._generate_fallback_playbook(analysis)
 
+    async def _hedged_playbook(self, request: str) -> Dict[str, Any]:
+        """
+        Hedged request: if the first call is still running after
+        HEDGE_DELAY_SECS, issue a duplicate and take whichever yields a valid
+        playbook first. Only slow-tail calls pay for a second request.
+        """
+        primary = asyncio.ensure_future(self._agenerate_playbook(request))
+        done, _ = await asyncio.wait({primary}, timeout=HEDGE_DELAY_SECS)
+        if done:
+            return primary.result()
+
+        pending = {primary, asyncio.ensure_future(self._agenerate_playbook(request))}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # Both calls failed: surface the primary's error to the retry loop
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _agenerate_playbook(self, request: str) -> Dict[str, Any]:
+        """One async streamed generation, parsed and validated"""
+        if hasattr(self.model, 'generate_content_async'):
+            response = await self.model.generate_content_async(request, stream=True)
+            scanner = JsonObjectScanner()
+            chunks = []
+            async for chunk in response:
+                chunks.append(chunk.text)
+                if scanner.feed(chunk.text):
+                    break
+            raw_response = ''.join(chunks)
+        else:
+            # Sync-only SDK: run the blocking call on a worker thread so
+            # concurrent syntheses don't stall the event loop
+            loop = asyncio.get_running_loop()
+            raw_response = await loop.run_in_executor(
+                _GEMINI_EXECUTOR, self._generate_streamed_text, request
+            )
+        return self._parse_playbook_response(raw_response)
+
+    async def asynthesize_many(
+        self,
+        analyses: List[Dict[str, Any]],
+        max_concurrency: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Synthesize playbooks for several analyses concurrently.
+
+        All requests are scheduled up front and bounded by a semaphore, so N
+        syntheses take roughly one round-trip when N <= max_concurrency.
+        Results are returned in input order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def synthesize_one(analysis: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.asynthesize_playbook(analysis)
+
+        return await asyncio.gather(*(synthesize_one(a) for a in analyses))
+
+    def _generate_streamed_text(self, prompt: str) -> str:
+        """Blocking streamed generation that stops reading once the JSON object closes"""
+        response = self.model.generate_content(prompt, stream=True)
+        scanner = JsonObjectScanner()
+        chunks = []
+        for chunk in response:
+            chunks.append(chunk.text)
+            if scanner.feed(chunk.text):
+                break
+        return ''.join(chunks)
+
+    def _synthesis_payload(self, analysis: Dict[str, Any]) -> str:
+        """Per-call part of the synthesis prompt: the serialized analysis"""
+        # Compact JSON: indentation only adds prompt tokens
+        data = orjson.dumps(analysis, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        return f"SIMULATION DATA:\n{data}\n"
+
+    def _build_synthesis_prompt(self, analysis: Dict[str, Any]) -> str:
+        """Build the full pattern-synthesis prompt for an analysis dict"""
+        return f"{SYNTHESIS_INSTRUCTIONS}\n{self._synthesis_payload(analysis)}"
+
+    def _synthesis_request(self, analysis: Dict[str, Any], prompt: str) -> str:
+        """Text actually sent: just the payload when the instructions are context-cached"""
+        if self.context_cache is not None:
+            return self._synthesis_payload(analysis)
+        return prompt
+
+    def _parse_playbook_response(self, raw_response: str) -> Dict[str, Any]:
+        """Extract and validate the playbook JSON from a Gemini response"""
+        # Extract JSON from response (markdown wrappers and trailing text are
+        # skipped by the brace scan, which never backtracks)
+        json_str = extract_json_object(raw_response)
+        if json_str is None:
+            # Try to clean common wrapper patterns
+            json_str = raw_response.replace('```json', '').replace('```', '').strip()
+
+        # Parse and validate in one pass; out-of-range or missing fields raise
+        # a ValidationError (a ValueError) naming the offending rule path
+        playbook_data = Playbook.model_validate_json(json_str).model_dump()
+
+        print(f"✅ Gemini generated {len(playbook_data['rules'])} rules")
+        return playbook_data
+
+    def _cache_path(self, prompt: str) -> Path:
+        """Cache file for a prompt: sha256 over the model name and full prompt text"""
+        key = hashlib.sha256(f"{GEMINI_MODEL}\0{prompt}".encode('utf-8')).hexdigest()
+        return RESPONSE_CACHE_DIR / f"{key}.json"
+
+    def _pipeline_cache_path(self, csv_path: str) -> Path:
+        """Pipeline cache file for a CSV: sha256 over its resolved path, size and mtime"""
+        st = os.stat(csv_path)
+        source = f"{GEMINI_MODEL}\0{os.path.abspath(csv_path)}\0{st.st_size}\0{st.st_mtime_ns}"
+        key = hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+        return PIPELINE_CACHE_DIR / f"playbook_{key}.json"
+
+    def _read_cached_playbook(self, cache_path: Path) -> Optional[Dict[str, Any]]:
+        """Load a cached playbook, treating unreadable entries as misses"""
+        try:
+            playbook_data = orjson.loads(cache_path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        return playbook_data if 'rules' in playbook_data else None
+
+    def _write_cached_playbook(self, cache_path: Path, playbook_data: Dict[str, Any]):
+        """Write a validated playbook atomically (temp file + rename)"""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+            tmp_path.write_bytes(orjson.dumps(playbook_data))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"⚠️ Could not cache Gemini response: {e}")
+
     def _generate_fallback_playbook(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate fallback playbook if Gemini API fails.
@@ -332,12 +829,17 @@ Make sure:
 
         return {"rules": rules, "fallback": True}
 
-    def generate_complete_playbook(self, csv_path: str = 'data/discovery_runs.csv') -> Dict[str, Any]:
+    def generate_complete_playbook(
+        self,
+        csv_path: str = 'data/discovery_runs.csv',
+        force: bool = False
+    ) -> Dict[str, Any]:
         """
         Complete pipeline: Load data → Analyze → Synthesize → Generate playbook.
 
         Args:
             csv_path: Path to simulation results CSV
+            force: Re-run the pipeline even if this CSV was already processed
 
         Returns:
             Complete playbook dict ready for AdaptiveAI
@@ -346,14 +848,45 @@ Make sure:
         print("AI STRATEGY DISCOVERY PIPELINE")
         print("="*60)
 
-        # Load simulation data
-        print(f"\nLoading simulation data from {csv_path}...")
-        df = pd.read_csv(csv_path)
-        print(f"Loaded {len(df):,} rows, {df['scenario_id'].nunique()} scenarios, {df['agent'].nunique()} agents")
+        # An unchanged CSV (same path, size and mtime) yields the same playbook
+        cache_path = self._pipeline_cache_path(csv_path)
+        playbook = None if force else self._read_cached_playbook(cache_path)
+        if playbook is not None:
+            print(f"\n✅ Using cached playbook for unchanged {csv_path} ({len(playbook['rules'])} rules)")
+        else:
+            playbook = self._discover_playbook(csv_path, cache_path)
+
+        # Save playbook (a cache hit is saved too, so the output always
+        # matches the CSV it was asked for)
+        output_path = 'data/playbook_discovered.json'
+        Path(output_path).write_bytes(
+            orjson.dumps(playbook, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        )
+
+        print(f"\n✅ Playbook saved to {output_path}")
+        print(f"   Generated {len(playbook['rules'])} rules using {playbook['generation_method']}")
+
+        # Display rule summary
+        print("\nDiscovered Rules:")
+        for i, rule in enumerate(playbook['rules'], 1):
+            print(f"  {i}. {rule['rule']} (confidence: {rule['confidence']:.0%}, "
+                  f"uplift: +{rule.get('uplift_win_pct', 0):.1f}%)")
+
+        return playbook
 
-        # Analyze patterns
+    def _discover_playbook(self, csv_path: str, cache_path: Path) -> Dict[str, Any]:
+        """Run the analysis and synthesis steps of the pipeline for one CSV"""
+        # Stream the simulation data through the analysis accumulator
+        print(f"\nStreaming simulation data from {csv_path}...")
         print("\nAnalyzing performance patterns...")
-        analysis = self.analyze_simulation_data(df)
+        analysis = self.analyze_simulation_csv(csv_path)
+        total_rows = analysis['simulation_metadata']['total_laps']
+        print(f"Processed {total_rows:,} rows")
+
+        # Distinct counts were already computed by the analysis pass
+        num_scenarios = analysis['simulation_metadata']['num_scenarios']
+        num_agents = analysis['simulation_metadata']['num_agents']
+        print(f"{num_scenarios} scenarios, {num_agents} agents")
 
         # Calculate some stats for display
         top_win_rate = analysis['performance_groups']['top_25_percent']['avg_win_rate']
@@ -368,8 +901,8 @@ Make sure:
         # Enhance playbook with metadata
         playbook = {
             "rules": playbook_data.get("rules", []),
-            "generated_at": pd.Timestamp.now().isoformat(),
-            "num_simulations": df['scenario_id'].nunique(),
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "num_simulations": num_scenarios,
             "schema_version": "2.0",
             "variables": [
                 "energy_deployment",
@@ -382,25 +915,15 @@ Make sure:
             "generation_method": "gemini_discovery" if not playbook_data.get("fallback") else "fallback_heuristics",
             "source_data": {
                 "csv_path": csv_path,
-                "num_scenarios": df['scenario_id'].nunique(),
-                "num_agents": df['agent'].nunique(),
-                "total_rows": len(df)
+                "num_scenarios": num_scenarios,
+                "num_agents": num_agents,
+                "total_rows": total_rows
             }
         }
 
-        # Save playbook
-        output_path = 'data/playbook_discovered.json'
-        with open(output_path, 'w') as f:
-            json.dump(playbook, f, indent=2)
-
-        print(f"\n✅ Playbook saved to {output_path}")
-        print(f"   Generated {len(playbook['rules'])} rules using {playbook['generation_method']}")
-
-        # Display rule summary
-        print("\nDiscovered Rules:")
-        for i, rule in enumerate(playbook['rules'], 1):
-            print(f"  {i}. {rule['rule']} (confidence: {rule['confidence']:.0%}, "
-                  f"uplift: +{rule.get('uplift_win_pct', 0):.1f}%)")
+        # Fallback heuristics are not memoized, so a rerun retries Gemini
+        if not playbook_data.get("fallback"):
+            self._write_cached_playbook(cache_path, playbook)
 
         return playbook
 
@@ -7,11 +7,18 @@ Date: 2025-10-19
 """
 
 import os
-import json
+import orjson
+import asyncio
 import time
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Tuple, Optional
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -25,6 +32,253 @@ except ImportError:
     print("⚠️ google-generativeai not installed. Install with: pip install google-generativeai")
 
 
+SYSTEM_PROMPT_PATH = 'prompts/gemini_game_advisor_system.txt'
+
+# Default system prompt if file doesn't exist
+DEFAULT_SYSTEM_PROMPT = """You are an expert F1 race strategist providing real-time tactical advice during a live race.
+
+CONTEXT:
+- 2026 F1 regulations with 50/50 ICE/Electric power split (350kW MGU-K)
+- Battery, tire, and fuel management are critical
+- 6 strategic variables control car behavior
+
+YOUR ROLE:
+The driver has paused the race at a critical decision point. You have simulation data for 3 possible strategies (100 races each).
+
+YOUR TASK:
+1. Recommend the TOP 2 strategies with highest success probability
+2. Identify the WORST 1 strategy to AVOID
+3. Be DECISIVE and ACTIONABLE - output ONLY valid JSON
+
+Consider race context, current position, resource states, and strategic implications of the current event."""
+
+
+def _supports_json_mode() -> bool:
+    """True if the installed SDK's GenerationConfig accepts response_mime_type."""
+    if not GEMINI_AVAILABLE:
+        return False
+    try:
+        return 'response_mime_type' in genai.types.GenerationConfig.__dataclass_fields__
+    except AttributeError:
+        return False
+
+
+# Sampling settings shared by the sync and async decision calls
+DECISION_GENERATION_CONFIG = {
+    'temperature': 0.2,  # Low for consistent, deterministic output
+    # gemini-2.5-flash spends part of this budget on thinking tokens, so it
+    # stays well above the ~300 tokens the JSON answer needs
+    'max_output_tokens': 1024,
+}
+if _supports_json_mode():
+    # Native JSON mode: no markdown fences or prose around the object
+    DECISION_GENERATION_CONFIG['response_mime_type'] = 'application/json'
+
+# Response timestamps: second-resolution UTC, formatted from the start time
+# the latency measurement already took
+ISO_UTC_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Gemini answers kept per advisor, keyed by a quantized decision context
+DECISION_CACHE_SIZE = 256
+
+# Retries share the caller's timeout as one budget: every attempt gets at
+# least MIN_ATTEMPT_TIMEOUT, and a retry is only made if its backoff still
+# leaves RETRY_MARGIN_SECS of the budget for the next attempt
+MIN_ATTEMPT_TIMEOUT = 0.05
+RETRY_MARGIN_SECS = 0.2
+
+# Narrow dtypes for the aggregated sim_results columns (positions and
+# strategy ids fit in int8, run ids in int16)
+SIM_RESULT_DTYPES = {
+    'strategy_id': np.int8,
+    'sim_run_id': np.int16,
+    'final_position': np.int8,
+    'won': np.bool_,
+    'battery_soc': np.float32,
+}
+
+# Finishing-position buckets for the position distribution. POSITION_BUCKET
+# is indexed by position clipped to 0..11 (0 and 11 stand for anything below
+# P1 / beyond P10)
+WIN_BUCKET, PODIUM_BUCKET, POINTS_BUCKET, OUTSIDE_BUCKET = range(4)
+NUM_POSITION_BUCKETS = 4
+POSITION_BUCKET = np.array(
+    [OUTSIDE_BUCKET, WIN_BUCKET, PODIUM_BUCKET, PODIUM_BUCKET]
+    + [POINTS_BUCKET] * 7
+    + [OUTSIDE_BUCKET],
+    dtype=np.intp
+)
+
+
+# ==========================================
+# DECISION PROMPT TEMPLATES
+# ==========================================
+
+PROMPT_SEPARATOR = '━' * 59
+
+# Display labels for the 6 strategy variables
+PARAM_LABELS = {
+    key: key.replace('_', ' ').title()
+    for key in (
+        'energy_deployment', 'tire_management', 'fuel_strategy',
+        'ers_mode', 'overtake_aggression', 'defense_intensity'
+    )
+}
+
+# Configuration block for a strategy carrying exactly those variables,
+# always rendered in the canonical order above
+PARAMS_TEMPLATE = "\n".join(
+    f"  • {label}: {{{key}}}" for key, label in PARAM_LABELS.items()
+)
+
+PROMPT_HEADER_TEMPLATE = """
+RACE SITUATION:
+- Lap: {lap}/{total_laps}
+- Current Position: P{position}
+- Battery SOC: {battery_soc:.1f}%
+- Tire Life: {tire_life:.1f}%
+- Fuel Remaining: {fuel_remaining:.1f} kg
+- **EVENT: {event_type}**
+
+STRATEGY ALTERNATIVES TESTED (100 simulations each):
+
+"""
+
+STRATEGY_BLOCK_TEMPLATE = """
+""" + PROMPT_SEPARATOR + """
+Strategy {letter}: {name}
+""" + PROMPT_SEPARATOR + """
+
+Configuration:
+{params}
+
+Results (100 races):
+- Win Rate: {win_rate:.1f}% ({wins} wins)
+- Podium Finishes: {podium} (P2-P3)
+- Points Finishes: {points} (P4-P10)
+- Outside Points: {outside_points}
+- Average Final Position: P{avg_position:.1f}
+- Average Final Battery: {avg_final_battery:.1f}%
+- DNF Rate: {dnf_rate:.1f}%
+
+"""
+
+# Static closing instructions and output schema (not a format template)
+PROMPT_FOOTER = """
+""" + PROMPT_SEPARATOR + """
+
+YOUR TASK:
+1. Recommend the TOP 2 strategies with highest success probability
+2. Identify the WORST 1 strategy to AVOID
+3. Be DECISIVE and ACTIONABLE - driver needs decision NOW
+
+Consider:
+- Current race position and objectives (win vs points)
+- Battery, tire, and fuel states
+- Event type and its strategic implications
+- Risk vs reward tradeoffs
+
+Output ONLY valid JSON (no markdown, no code blocks):
+
+{
+  "recommended": [
+    {
+      "strategy_id": 0,
+      "rationale": "Clear 2-3 sentence explanation why this works best",
+      "confidence": 0.85
+    },
+    {
+      "strategy_id": 1,
+      "rationale": "Clear 2-3 sentence explanation why this is second best",
+      "confidence": 0.78
+    }
+  ],
+  "avoid": {
+    "strategy_id": 2,
+    "rationale": "Clear 2-3 sentence explanation why this fails",
+    "risk": "Specific measurable consequence (e.g., 'Drops to P7 in 82% of scenarios')"
+  }
+}
+"""
+
+
+# ==========================================
+# GEMINI RESPONSE SCHEMA
+# ==========================================
+
+class RecommendedStrategy(BaseModel):
+    """One of the two recommended strategies; extra keys (rationale) are kept"""
+    model_config = ConfigDict(extra='allow')
+
+    strategy_id: int
+    confidence: float = 0.75
+
+
+class AvoidStrategy(BaseModel):
+    """The strategy to avoid; extra keys (rationale, risk) are kept"""
+    model_config = ConfigDict(extra='allow')
+
+    strategy_id: int
+
+
+class DecisionResponse(BaseModel):
+    """Shape a Gemini decision answer must have"""
+    model_config = ConfigDict(extra='allow')
+
+    recommended: List[RecommendedStrategy] = Field(min_length=2, max_length=2)
+    avoid: AvoidStrategy
+
+
+# Instructions for a batched request covering several decision points
+BATCH_PROMPT_FOOTER = """
+""" + PROMPT_SEPARATOR + """
+
+YOUR TASK:
+For EACH decision above, independently:
+1. Recommend the TOP 2 strategies with highest success probability
+2. Identify the WORST 1 strategy to AVOID
+3. Be DECISIVE and ACTIONABLE - drivers need decisions NOW
+
+Output ONLY a valid JSON array (no markdown, no code blocks) with one object
+per decision, using the decision_id from its DECISION header:
+
+[
+  {
+    "decision_id": 0,
+    "recommended": [
+      {"strategy_id": 0, "rationale": "Clear 2-3 sentence explanation", "confidence": 0.85},
+      {"strategy_id": 1, "rationale": "Clear 2-3 sentence explanation", "confidence": 0.78}
+    ],
+    "avoid": {
+      "strategy_id": 2,
+      "rationale": "Clear 2-3 sentence explanation why this fails",
+      "risk": "Specific measurable consequence"
+    }
+  }
+]
+"""
+
+
+def load_system_prompt() -> str:
+    """Load the advisor system prompt, re-reading the file only when it changes."""
+    try:
+        mtime_ns = os.stat(SYSTEM_PROMPT_PATH).st_mtime_ns
+    except OSError:
+        return DEFAULT_SYSTEM_PROMPT
+    return _read_system_prompt(mtime_ns)
+
+
+@lru_cache(maxsize=1)
+def _read_system_prompt(mtime_ns: int) -> str:
+    with open(SYSTEM_PROMPT_PATH, 'r') as f:
+        return f.read()
+
+
+# Read the prompt once at import so constructing an advisor (e.g. when a game
+# session starts) only costs a stat; edits to the file are still picked up
+load_system_prompt()
+
+
 class GameAdvisor:
     """Provides real-time strategy recommendations during gameplay."""
 
@@ -39,6 +293,13 @@ class GameAdvisor:
         self.gemini_available = False
         self.model = None
 
+        # Replayed decision points (same event, similar state and sim results)
+        # are answered from an LRU cache instead of another Gemini round-trip
+        self._cache: 'OrderedDict[tuple, dict]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
         # CHERRY-PICKED PATTERN from PR #6 (graceful degradation)
         if GEMINI_AVAILABLE and self.api_key and self.api_key != 'your_key_here':
             try:
@@ -77,7 +338,8 @@ class GameAdvisor:
         Args:
             sim_results: DataFrame with simulation results (100 rows per strategy)
                 Required columns: strategy_id, final_position, won
-                Optional columns: battery_soc, lap, tire_life, fuel_remaining
+                Optional columns: battery_soc, lap, tire_life, fuel_remaining,
+                sim_run_id (rows of one run must be contiguous, in lap order)
 
             race_context: Current race state
                 {
@@ -140,22 +402,86 @@ class GameAdvisor:
         # Step 1: Aggregate simulation results
         strategy_stats = self._aggregate_strategy_results(sim_results, strategy_params)
 
+        return self._recommend(strategy_stats, race_context, strategy_params, timeout_seconds, start_time)
+
+    def analyze_decision_point_arrays(
+        self,
+        race_context: dict,
+        strategy_params: List[dict],
+        strategy_id: np.ndarray,
+        final_position: Optional[np.ndarray] = None,
+        won: Optional[np.ndarray] = None,
+        battery_soc: Optional[np.ndarray] = None,
+        sim_run_id: Optional[np.ndarray] = None,
+        timeout_seconds: float = 10.0
+    ) -> dict:
+        """
+        analyze_decision_point for callers that already hold the simulation
+        results as NumPy columns (one element per row), skipping the
+        DataFrame layer entirely. Returns the same dict.
+        """
+
+        start_time = time.time()
+
+        strategy_stats = self._aggregate_strategy_results_np(
+            strategy_params,
+            strategy_id,
+            final_position=final_position,
+            won=won,
+            battery_soc=battery_soc,
+            sim_run_id=sim_run_id
+        )
+
+        return self._recommend(strategy_stats, race_context, strategy_params, timeout_seconds, start_time)
+
+    def _recommend(
+        self,
+        strategy_stats: List[dict],
+        race_context: dict,
+        strategy_params: List[dict],
+        timeout_seconds: float,
+        start_time: float
+    ) -> dict:
+        """
+        Steps 2-3 of analyze_decision_point: Gemini (or fallback)
+        recommendations for aggregated strategy stats, plus metadata.
+        """
+
         # Step 2: Try Gemini (with timeout and retry)
+        recommendations = None
         if self.gemini_available:
             try:
-                recommendations = self._call_gemini_with_timeout(
-                    strategy_stats,
-                    race_context,
-                    timeout_seconds
-                )
-                recommendations['used_fallback'] = False
-                recommendations['gemini_available'] = True
+                cache_key = self._decision_cache_key(strategy_stats, race_context)
+                recommendations = self._cached_recommendations(cache_key, strategy_stats)
+                if recommendations is None:
+                    recommendations = self._call_gemini_with_timeout(
+                        strategy_stats,
+                        race_context,
+                        timeout_seconds
+                    )
+                    self._store_recommendations(cache_key, recommendations)
             except Exception as e:
                 print(f"⚠️ Gemini analysis failed: {e}")
                 print("📋 Using fallback recommendations")
-                recommendations = self._fallback_recommendations(strategy_stats, strategy_params)
-                recommendations['used_fallback'] = True
-                recommendations['gemini_available'] = False
+                recommendations = None
+
+        return self._finish_recommendations(recommendations, strategy_stats, strategy_params, start_time)
+
+    def _finish_recommendations(
+        self,
+        recommendations: Optional[dict],
+        strategy_stats: List[dict],
+        strategy_params: List[dict],
+        start_time: float
+    ) -> dict:
+        """
+        Fallback recommendations if Gemini gave none, then the source flags
+        and Step 3 metadata shared by the sync and async paths.
+        """
+
+        if recommendations is not None:
+            recommendations['used_fallback'] = False
+            recommendations['gemini_available'] = True
         else:
             recommendations = self._fallback_recommendations(strategy_stats, strategy_params)
             recommendations['used_fallback'] = True
@@ -163,14 +489,209 @@ class GameAdvisor:
 
         # Step 3: Add metadata
         recommendations['latency_ms'] = int((time.time() - start_time) * 1000)
-        recommendations['timestamp'] = datetime.utcnow().isoformat() + 'Z'
+        recommendations['timestamp'] = time.strftime(ISO_UTC_FORMAT, time.gmtime(start_time))
 
         return recommendations
 
+    async def aanalyze_decision_point(
+        self,
+        sim_results: pd.DataFrame,
+        race_context: dict,
+        strategy_params: List[dict],
+        timeout_seconds: float = 10.0
+    ) -> dict:
+        """
+        Async variant of analyze_decision_point.
+
+        Awaits the Gemini call instead of blocking a thread, so several
+        advisors (e.g. rival cars) can be consulted concurrently on one event
+        loop. Arguments, fallback behaviour and the returned dict match the
+        sync path.
+        """
+
+        start_time = time.time()
+
+        # Step 1: Aggregate simulation results
+        strategy_stats = self._aggregate_strategy_results(sim_results, strategy_params)
+
+        # Step 2: Try Gemini (as in _recommend, but awaited)
+        recommendations = None
+        if self.gemini_available:
+            try:
+                cache_key = self._decision_cache_key(strategy_stats, race_context)
+                recommendations = self._cached_recommendations(cache_key, strategy_stats)
+                if recommendations is None:
+                    recommendations = await self._acall_gemini_with_timeout(
+                        strategy_stats,
+                        race_context,
+                        timeout_seconds
+                    )
+                    self._store_recommendations(cache_key, recommendations)
+            except Exception as e:
+                print(f"⚠️ Gemini analysis failed: {e}")
+                print("📋 Using fallback recommendations")
+                recommendations = None
+
+        return self._finish_recommendations(recommendations, strategy_stats, strategy_params, start_time)
+
+    async def aanalyze_decision_points_batch(
+        self,
+        decisions: List[dict],
+        timeout_seconds: float = 10.0
+    ) -> List[dict]:
+        """
+        Analyze several decision points with a single Gemini request.
+
+        Args:
+            decisions: List of dicts with the analyze_decision_point arguments
+                {'sim_results': ..., 'race_context': ..., 'strategy_params': ...}
+            timeout_seconds: Max time for the batched Gemini call
+
+        Returns:
+            One recommendations dict per decision, in input order, shaped like
+            analyze_decision_point's. Decisions the batch answer does not
+            cover (or the whole batch, if the call fails) get fallback
+            recommendations.
+        """
+
+        start_time = time.time()
+
+        all_stats = [
+            self._aggregate_strategy_results(d['sim_results'], d['strategy_params'])
+            for d in decisions
+        ]
+
+        answers: Dict[int, dict] = {}
+        if self.gemini_available and decisions:
+            try:
+                answers = await self._acall_gemini_batch(all_stats, decisions, timeout_seconds)
+            except Exception as e:
+                print(f"⚠️ Batched Gemini analysis failed: {e}")
+                print("📋 Using fallback recommendations")
+
+        return [
+            self._finish_recommendations(
+                answers.get(decision_id), strategy_stats, decision['strategy_params'], start_time
+            )
+            for decision_id, (decision, strategy_stats) in enumerate(zip(decisions, all_stats))
+        ]
+
+    async def _acall_gemini_batch(
+        self,
+        all_stats: List[List[dict]],
+        decisions: List[dict],
+        timeout: float
+    ) -> Dict[int, dict]:
+        """
+        One Gemini call for every decision: returns validated, enriched
+        recommendations keyed by decision_id. Answers that are missing or fail
+        validation are left out so the caller can fall back per decision.
+        """
+
+        prompt = ''.join(
+            f"\n=== DECISION {decision_id} ===\n"
+            + self._build_decision_context(strategy_stats, decision['race_context'])
+            for decision_id, (decision, strategy_stats) in enumerate(zip(decisions, all_stats))
+        ) + BATCH_PROMPT_FOOTER
+
+        # Room for every decision's answer in the one response
+        generation_config = dict(
+            DECISION_GENERATION_CONFIG,
+            max_output_tokens=DECISION_GENERATION_CONFIG['max_output_tokens'] * len(decisions)
+        )
+
+        if hasattr(self.model, 'generate_content_async'):
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt, generation_config=generation_config),
+                timeout
+            )
+        else:
+            response = await asyncio.to_thread(
+                self.model.generate_content,
+                prompt,
+                generation_config=generation_config,
+                request_options={'timeout': timeout}
+            )
+
+        parsed = self._parse_gemini_response(response.text)
+        if not isinstance(parsed, list):
+            raise ValueError("Batched Gemini response must be a JSON array")
+
+        answers = {}
+        for answer in parsed:
+            decision_id = answer.get('decision_id') if isinstance(answer, dict) else None
+            if not isinstance(decision_id, int) or not 0 <= decision_id < len(decisions):
+                continue
+            try:
+                answers[decision_id] = self._validate_and_enrich_recommendations(
+                    answer, all_stats[decision_id]
+                )
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"⚠️ Decision {decision_id} answer invalid: {e}")
+        return answers
+
     # ==========================================
     # HELPER METHODS
     # ==========================================
 
+    def _decision_cache_key(self, strategy_stats: List[dict], race_context: dict) -> tuple:
+        """
+        Decision context for the response cache: exact lap and position,
+        resources in 5% steps, and a digest of every aggregated strategy
+        (params and stats), so an answer is only replayed for the same
+        strategy set and near-identical results.
+        """
+        return (
+            race_context.get('event_type', 'DECISION_POINT'),
+            race_context.get('lap', 0),
+            race_context.get('position', 0),
+            round(race_context.get('battery_soc', 50.0) / 5),
+            round(race_context.get('tire_life', 100.0) / 5),
+            round(race_context.get('fuel_remaining', 50.0) / 5),
+            self._strategy_stats_digest(strategy_stats)
+        )
+
+    def _strategy_stats_digest(self, strategy_stats: List[dict]) -> bytes:
+        """Digest of each strategy's id, params and (quantized) aggregated stats"""
+        summary = [
+            (
+                stats['strategy_id'],
+                stats['params'],
+                round(stats['win_rate']),
+                round(stats['avg_position'], 1),
+                stats['position_distribution'],
+                round(stats['avg_final_battery'])
+            )
+            for stats in strategy_stats
+        ]
+        return hashlib.blake2b(
+            orjson.dumps(summary, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY),
+            digest_size=16
+        ).digest()
+
+    def _cached_recommendations(self, key: tuple, strategy_stats: List[dict]) -> Optional[dict]:
+        """
+        Cached Gemini answer re-enriched with the current strategy stats, or
+        None on a miss. A copy is returned because callers mutate it.
+        """
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+        return self._validate_and_enrich_recommendations(copy.deepcopy(cached), strategy_stats)
+
+    def _store_recommendations(self, key: tuple, recommendations: dict):
+        """Cache a validated Gemini answer, evicting the least recently used."""
+        snapshot = copy.deepcopy(recommendations)
+        with self._cache_lock:
+            self._cache[key] = snapshot
+            self._cache.move_to_end(key)
+            if len(self._cache) > DECISION_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
     def _aggregate_strategy_results(
         self,
         sim_results: pd.DataFrame,
@@ -198,63 +719,131 @@ class GameAdvisor:
                 ...
             ]
         """
-        aggregated = []
+        # Nothing to summarize: skip the aggregation entirely
+        if sim_results.empty:
+            for strategy_id in range(len(strategy_params)):
+                print(f"⚠️ No simulation data for strategy {strategy_id}")
+            return []
 
-        num_strategies = len(strategy_params)
+        # Pull each column out once, downcast on ingress (optional columns
+        # that are absent stay None)
+        columns = {
+            col: sim_results[col].to_numpy(dtype=dtype) if col in sim_results.columns else None
+            for col, dtype in SIM_RESULT_DTYPES.items()
+        }
 
-        for strategy_id in range(num_strategies):
-            # Filter data for this strategy
-            strategy_data = sim_results[sim_results['strategy_id'] == strategy_id].copy()
+        return self._aggregate_strategy_results_np(strategy_params, **columns)
 
-            if len(strategy_data) == 0:
-                print(f"⚠️ No simulation data for strategy {strategy_id}")
-                continue
+    def _aggregate_strategy_results_np(
+        self,
+        strategy_params: List[dict],
+        strategy_id: np.ndarray,
+        final_position: Optional[np.ndarray] = None,
+        won: Optional[np.ndarray] = None,
+        battery_soc: Optional[np.ndarray] = None,
+        sim_run_id: Optional[np.ndarray] = None
+    ) -> List[dict]:
+        """
+        _aggregate_strategy_results over plain NumPy columns (one element
+        per simulation row). Same output.
+        """
+        aggregated = []
 
-            # Calculate win metrics
-            total_sims = len(strategy_data)
-            wins = int(strategy_data['won'].sum()) if 'won' in strategy_data.columns else 0
-
-            # Position distribution
-            if 'final_position' in strategy_data.columns:
-                p1_count = wins
-                p2_3_count = len(strategy_data[strategy_data['final_position'].isin([2, 3])])
-                p4_10_count = len(strategy_data[
-                    (strategy_data['final_position'] >= 4) &
-                    (strategy_data['final_position'] <= 10)
-                ])
-                outside_points = total_sims - p1_count - p2_3_count - p4_10_count
+        num_strategies = len(strategy_params)
 
-                avg_position = float(strategy_data['final_position'].mean())
+        # Every per-strategy statistic comes from one pass over the rows:
+        # bincounts keyed by strategy_id instead of a filtered copy per strategy
+        sid = np.asarray(strategy_id)
+        valid = (sid >= 0) & (sid < num_strategies)
+        # Normally every row belongs to a requested strategy: index with a
+        # full slice (a view) instead of copying each column through the mask
+        rows = slice(None) if valid.all() else valid
+        sid = sid[rows].astype(np.intp, copy=False)
+        totals = np.bincount(sid, minlength=num_strategies)
+
+        if won is not None:
+            won = np.asarray(won, dtype=bool)[rows]
+            wins = np.bincount(sid[won], minlength=num_strategies)
+        else:
+            wins = np.zeros(num_strategies, dtype=np.int64)
+
+        if final_position is not None:
+            final_position = np.asarray(final_position)[rows]
+            # Positions map straight to their finishing bucket through a lookup
+            # table, so one (strategy, bucket) bincount gives every count
+            pos = np.clip(final_position, 0, 11).astype(np.intp, copy=False)
+            buckets = np.bincount(
+                sid * NUM_POSITION_BUCKETS + POSITION_BUCKET[pos],
+                minlength=num_strategies * NUM_POSITION_BUCKETS
+            ).reshape(num_strategies, NUM_POSITION_BUCKETS)
+            podium = buckets[:, PODIUM_BUCKET]
+            points = buckets[:, POINTS_BUCKET]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                avg_positions = np.bincount(
+                    sid,
+                    weights=final_position,
+                    minlength=num_strategies
+                ) / totals
+        else:
+            podium = np.zeros(num_strategies, dtype=np.int64)
+            points = np.zeros(num_strategies, dtype=np.int64)
+            avg_positions = np.full(num_strategies, 5.0)
+
+        # Battery analysis (get final battery from last row of each sim)
+        avg_batteries = np.full(num_strategies, 50.0)  # default
+        if battery_soc is not None and sid.size:
+            battery = np.asarray(battery_soc)[rows]
+            if sim_run_id is not None:
+                run = np.asarray(sim_run_id)[rows]
+                run_sid = sid
+                # The sims emit strategy by strategy, run by run, so rows are
+                # normally sorted by (strategy, run) and each pair is a
+                # contiguous block. Other row orders are stable-sorted into
+                # blocks first, keeping each run's rows in their original order
+                same_sid = sid[:-1] == sid[1:]
+                if not ((sid[:-1] <= sid[1:]).all() and (run[:-1][same_sid] <= run[1:][same_sid]).all()):
+                    order = np.lexsort((np.arange(sid.size), run, sid))
+                    run_sid, run, battery = sid[order], run[order], battery[order]
+                # A block's last row is where the next row starts a different
+                # block: one linear compare instead of hashing the keys
+                last_mask = np.empty(run_sid.size, dtype=bool)
+                last_mask[:-1] = (run_sid[:-1] != run_sid[1:]) | (run[:-1] != run[1:])
+                last_mask[-1] = True
+                final_sid = run_sid[last_mask]
+                final_battery = battery[last_mask]
             else:
-                p1_count = wins
-                p2_3_count = 0
-                p4_10_count = 0
-                outside_points = total_sims - wins
-                avg_position = 5.0
-
-            # Battery analysis (get final battery from last lap of each sim)
-            avg_final_battery = 50.0  # default
-            if 'battery_soc' in strategy_data.columns:
-                # Group by simulation run and get last battery value
-                if 'sim_run_id' in strategy_data.columns:
-                    final_batteries = strategy_data.groupby('sim_run_id')['battery_soc'].last()
-                    avg_final_battery = float(final_batteries.mean())
-                else:
-                    # If no sim_run_id, assume last rows are final states
-                    avg_final_battery = float(strategy_data['battery_soc'].tail(total_sims).mean())
+                # If no sim_run_id, every row is a final state
+                final_sid = sid
+                final_battery = battery
+            runs = np.bincount(final_sid, minlength=num_strategies)
+            battery_sums = np.bincount(final_sid, weights=final_battery, minlength=num_strategies)
+            has_runs = runs > 0
+            avg_batteries[has_runs] = battery_sums[has_runs] / runs[has_runs]
+
+        # Convert each result array to Python scalars in one call rather than
+        # boxing a NumPy scalar per strategy and statistic
+        per_strategy = zip(
+            totals.tolist(), wins.tolist(), podium.tolist(), points.tolist(),
+            avg_positions.tolist(), avg_batteries.tolist()
+        )
+        for strategy_id, (total_sims, p1_count, p2_3_count, p4_10_count,
+                          avg_position, avg_battery) in enumerate(per_strategy):
+            if total_sims == 0:
+                print(f"⚠️ No simulation data for strategy {strategy_id}")
+                continue
 
             aggregated.append({
                 'strategy_id': strategy_id,
                 'params': strategy_params[strategy_id],
-                'win_rate': (wins / total_sims * 100) if total_sims > 0 else 0.0,
+                'win_rate': p1_count / total_sims * 100,
                 'avg_position': avg_position,
                 'position_distribution': {
                     'wins': p1_count,
                     'podium': p2_3_count,
                     'points': p4_10_count,
-                    'outside_points': outside_points
+                    'outside_points': total_sims - p1_count - p2_3_count - p4_10_count
                 },
-                'avg_final_battery': avg_final_battery,
+                'avg_final_battery': avg_battery,
                 'dnf_rate': 0.0  # TODO: Track DNFs when physics supports it
             })
 
@@ -268,89 +857,59 @@ class GameAdvisor:
         """
         Build Gemini prompt for real-time decision analysis.
         """
+        return self._build_decision_context(strategy_stats, race_context) + PROMPT_FOOTER
 
-        strategy_names = ['Aggressive', 'Balanced', 'Conservative']
-
-        prompt = f"""
-RACE SITUATION:
-- Lap: {race_context.get('lap', 0)}/{race_context.get('total_laps', 57)}
-- Current Position: P{race_context.get('position', 0)}
-- Battery SOC: {race_context.get('battery_soc', 50.0):.1f}%
-- Tire Life: {race_context.get('tire_life', 100.0):.1f}%
-- Fuel Remaining: {race_context.get('fuel_remaining', 50.0):.1f} kg
-- **EVENT: {race_context.get('event_type', 'DECISION_POINT')}**
+    def _build_decision_context(
+        self,
+        strategy_stats: List[dict],
+        race_context: dict
+    ) -> str:
+        """
+        Race situation and strategy results for one decision point (the
+        prompt without its task instructions).
+        """
 
-STRATEGY ALTERNATIVES TESTED (100 simulations each):
+        strategy_names = ['Aggressive', 'Balanced', 'Conservative']
 
-"""
+        parts = [PROMPT_HEADER_TEMPLATE.format(
+            lap=race_context.get('lap', 0),
+            total_laps=race_context.get('total_laps', 57),
+            position=race_context.get('position', 0),
+            battery_soc=race_context.get('battery_soc', 50.0),
+            tire_life=race_context.get('tire_life', 100.0),
+            fuel_remaining=race_context.get('fuel_remaining', 50.0),
+            event_type=race_context.get('event_type', 'DECISION_POINT')
+        )]
 
         for i, stats in enumerate(strategy_stats):
             strategy_name = strategy_names[i] if i < len(strategy_names) else f"Strategy {i}"
 
-            params_formatted = "\n".join([
-                f"  • {key.replace('_', ' ').title()}: {value}"
-                for key, value in stats['params'].items()
-            ])
+            params = stats['params']
+            if params.keys() == PARAM_LABELS.keys():
+                params_formatted = PARAMS_TEMPLATE.format_map(params)
+            else:
+                params_formatted = "\n".join([
+                    f"  • {PARAM_LABELS.get(key) or key.replace('_', ' ').title()}: {value}"
+                    for key, value in params.items()
+                ])
 
             dist = stats['position_distribution']
 
-            prompt += f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Strategy {chr(65+i)}: {strategy_name}
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Configuration:
-{params_formatted}
-
-Results (100 races):
-- Win Rate: {stats['win_rate']:.1f}% ({dist['wins']} wins)
-- Podium Finishes: {dist['podium']} (P2-P3)
-- Points Finishes: {dist['points']} (P4-P10)
-- Outside Points: {dist['outside_points']}
-- Average Final Position: P{stats['avg_position']:.1f}
-- Average Final Battery: {stats['avg_final_battery']:.1f}%
-- DNF Rate: {stats['dnf_rate']:.1f}%
-
-"""
-
-        prompt += """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-YOUR TASK:
-1. Recommend the TOP 2 strategies with highest success probability
-2. Identify the WORST 1 strategy to AVOID
-3. Be DECISIVE and ACTIONABLE - driver needs decision NOW
-
-Consider:
-- Current race position and objectives (win vs points)
-- Battery, tire, and fuel states
-- Event type and its strategic implications
-- Risk vs reward tradeoffs
-
-Output ONLY valid JSON (no markdown, no code blocks):
-
-{
-  "recommended": [
-    {
-      "strategy_id": 0,
-      "rationale": "Clear 2-3 sentence explanation why this works best",
-      "confidence": 0.85
-    },
-    {
-      "strategy_id": 1,
-      "rationale": "Clear 2-3 sentence explanation why this is second best",
-      "confidence": 0.78
-    }
-  ],
-  "avoid": {
-    "strategy_id": 2,
-    "rationale": "Clear 2-3 sentence explanation why this fails",
-    "risk": "Specific measurable consequence (e.g., 'Drops to P7 in 82% of scenarios')"
-  }
-}
-"""
-
-        return prompt
+            parts.append(STRATEGY_BLOCK_TEMPLATE.format(
+                letter=chr(65 + i),
+                name=strategy_name,
+                params=params_formatted,
+                win_rate=stats['win_rate'],
+                wins=dist['wins'],
+                podium=dist['podium'],
+                points=dist['points'],
+                outside_points=dist['outside_points'],
+                avg_position=stats['avg_position'],
+                avg_final_battery=stats['avg_final_battery'],
+                dnf_rate=stats['dnf_rate']
+            ))
+
+        return ''.join(parts)
 
     def _call_gemini_with_timeout(
         self,
@@ -361,21 +920,21 @@ Output ONLY valid JSON (no markdown, no code blocks):
         """
         Call Gemini with timeout and retry logic.
         ADAPTED FROM PR #6 retry pattern.
+
+        `timeout` bounds all attempts and backoff together, not each attempt.
         """
 
         prompt = self._build_game_decision_prompt(strategy_stats, race_context)
 
         max_retries = 2  # Fast retries for game loop (total 3 attempts)
+        deadline = time.monotonic() + timeout
 
         for attempt in range(max_retries + 1):
             try:
                 response = self.model.generate_content(
                     prompt,
-                    generation_config={
-                        'temperature': 0.2,  # Low for consistent, deterministic output
-                        'max_output_tokens': 1024,
-                    },
-                    request_options={'timeout': timeout}
+                    generation_config=DECISION_GENERATION_CONFIG,
+                    request_options={'timeout': max(MIN_ATTEMPT_TIMEOUT, deadline - time.monotonic())}
                 )
 
                 # Parse response (handles markdown wrappers)
@@ -387,14 +946,67 @@ Output ONLY valid JSON (no markdown, no code blocks):
                 return validated
 
             except Exception as e:
-                if attempt < max_retries:
-                    wait_time = 0.3 * (2 ** attempt)  # 0.3s, 0.6s
-                    print(f"⚠️ Gemini attempt {attempt+1} failed: {e}")
-                    print(f"   Retrying in {wait_time:.1f}s...")
-                    time.sleep(wait_time)
-                else:
-                    print(f"❌ Gemini failed after {max_retries+1} attempts")
-                    raise
+                time.sleep(self._retry_wait(e, attempt, max_retries, deadline))
+
+    async def _acall_gemini_with_timeout(
+        self,
+        strategy_stats: List[dict],
+        race_context: dict,
+        timeout: float
+    ) -> dict:
+        """
+        Async counterpart of _call_gemini_with_timeout.
+
+        Each attempt is bounded with asyncio.wait_for and backoff uses
+        asyncio.sleep, so waiting on Gemini never blocks the event loop.
+        """
+
+        if not hasattr(self.model, 'generate_content_async'):
+            # Sync-only SDK: keep the blocking call off the event loop
+            return await asyncio.to_thread(
+                self._call_gemini_with_timeout, strategy_stats, race_context, timeout
+            )
+
+        prompt = self._build_game_decision_prompt(strategy_stats, race_context)
+
+        max_retries = 2  # Fast retries for game loop (total 3 attempts)
+        deadline = time.monotonic() + timeout
+
+        for attempt in range(max_retries + 1):
+            try:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(
+                        prompt,
+                        generation_config=DECISION_GENERATION_CONFIG
+                    ),
+                    max(MIN_ATTEMPT_TIMEOUT, deadline - time.monotonic())
+                )
+
+                parsed = self._parse_gemini_response(response.text)
+                return self._validate_and_enrich_recommendations(parsed, strategy_stats)
+
+            except Exception as e:
+                await asyncio.sleep(self._retry_wait(e, attempt, max_retries, deadline))
+
+    def _retry_wait(self, error: Exception, attempt: int, max_retries: int, deadline: float) -> float:
+        """
+        Backoff before retrying a failed Gemini attempt (0.3s, 0.6s), cut to
+        what is left of the deadline. Re-raises `error` once retries or the
+        timeout budget run out.
+        """
+        wait_time = min(
+            0.3 * (2 ** attempt),
+            deadline - time.monotonic() - RETRY_MARGIN_SECS
+        )
+        if attempt < max_retries and wait_time > 0:
+            print(f"⚠️ Gemini attempt {attempt+1} failed: {error}")
+            print(f"   Retrying in {wait_time:.1f}s...")
+            return wait_time
+        if attempt < max_retries:
+            print(f"❌ Gemini failed after {attempt+1} attempts (timeout budget spent)")
+        else:
+            print(f"❌ Gemini failed after {max_retries+1} attempts")
+        raise error
 
     def _parse_gemini_response(self, text: str) -> dict:
         """
@@ -403,20 +1015,16 @@ Output ONLY valid JSON (no markdown, no code blocks):
         """
         text = text.strip()
 
-        # Remove markdown code blocks if present
-        if text.startswith('```json'):
-            text = text[7:]
-        elif text.startswith('```'):
-            text = text[3:]
-
-        if text.endswith('```'):
-            text = text[:-3]
-
-        text = text.strip()
+        # JSON mode returns a bare object; fences only appear on SDKs without it
+        if text.startswith('```'):
+            text = text[7:] if text.startswith('```json') else text[3:]
+            if text.endswith('```'):
+                text = text[:-3]
+            text = text.strip()
 
         try:
-            return json.loads(text)
-        except json.JSONDecodeError as e:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError as e:
             raise ValueError(
                 f"Failed to parse Gemini JSON response: {e}\n\n"
                 f"Response preview:\n{text[:500]}"
@@ -433,25 +1041,13 @@ Output ONLY valid JSON (no markdown, no code blocks):
 
         strategy_names = ['Aggressive', 'Balanced', 'Conservative']
 
-        # Check required fields
-        if 'recommended' not in recommendations:
-            raise ValueError("Missing 'recommended' field in Gemini response")
-        if 'avoid' not in recommendations:
-            raise ValueError("Missing 'avoid' field in Gemini response")
-
-        if not isinstance(recommendations['recommended'], list):
-            raise ValueError("'recommended' must be a list")
-
-        if len(recommendations['recommended']) != 2:
-            raise ValueError(
-                f"Expected exactly 2 recommendations, got {len(recommendations['recommended'])}"
-            )
+        # Structural checks (both fields present, exactly 2 recommendations,
+        # integer strategy ids, default confidence) happen in one schema pass;
+        # failures raise a ValidationError, which is a ValueError
+        recommendations = DecisionResponse.model_validate(recommendations).model_dump()
 
         # Enrich recommended strategies with stats
         for rec in recommendations['recommended']:
-            if 'strategy_id' not in rec:
-                raise ValueError("Recommendation missing 'strategy_id'")
-
             sid = rec['strategy_id']
 
             if sid < 0 or sid >= len(strategy_stats):
@@ -463,15 +1059,8 @@ Output ONLY valid JSON (no markdown, no code blocks):
             rec['win_rate'] = strategy_stats[sid]['win_rate']
             rec['avg_position'] = strategy_stats[sid]['avg_position']
 
-            # Ensure confidence exists
-            if 'confidence' not in rec:
-                rec['confidence'] = 0.75  # Default
-
         # Enrich avoid strategy
         avoid = recommendations['avoid']
-        if 'strategy_id' not in avoid:
-            raise ValueError("Avoid recommendation missing 'strategy_id'")
-
         sid = avoid['strategy_id']
 
         if sid < 0 or sid >= len(strategy_stats):
@@ -496,17 +1085,32 @@ Output ONLY valid JSON (no markdown, no code blocks):
 
         strategy_names = ['Aggressive', 'Balanced', 'Conservative']
 
-        # Sort strategies by win rate (descending)
-        sorted_stats = sorted(
-            enumerate(strategy_stats),
-            key=lambda x: x[1]['win_rate'],
-            reverse=True
-        )
+        # Rank strategies by win rate (descending); the stable sort keeps the
+        # earlier strategy first on ties, as sorted(reverse=True) did
+        if len(strategy_stats) == 3:
+            # The usual A/B/C case: a 3-comparison compare-swap network.
+            # Strict comparisons keep it stable like the general path
+            a, b, c = (stats['win_rate'] for stats in strategy_stats)
+            top1_idx, top2_idx, worst_idx = 0, 1, 2
+            if b > a:
+                top1_idx, top2_idx, a, b = top2_idx, top1_idx, b, a
+            if c > b:
+                top2_idx, worst_idx, b = worst_idx, top2_idx, c
+            if b > a:
+                top1_idx, top2_idx = top2_idx, top1_idx
+        else:
+            win_rates = np.fromiter(
+                (stats['win_rate'] for stats in strategy_stats),
+                dtype=np.float64,
+                count=len(strategy_stats)
+            )
+            order = np.argsort(-win_rates, kind='stable')
+            top1_idx, top2_idx, worst_idx = int(order[0]), int(order[1]), int(order[-1])
 
         # Top 2 strategies
-        top1_idx, top1_stats = sorted_stats[0]
-        top2_idx, top2_stats = sorted_stats[1]
-        worst_idx, worst_stats = sorted_stats[-1]
+        top1_stats = strategy_stats[top1_idx]
+        top2_stats = strategy_stats[top2_idx]
+        worst_stats = strategy_stats[worst_idx]
 
         return {
             'recommended': [
@@ -546,34 +1150,31 @@ Output ONLY valid JSON (no markdown, no code blocks):
 
     def _load_system_prompt(self) -> str:
         """Load system prompt from file or use default."""
-        prompt_path = 'prompts/gemini_game_advisor_system.txt'
+        return load_system_prompt()
 
-        if os.path.exists(prompt_path):
-            with open(prompt_path, 'r') as f:
-                return f.read()
-        else:
-            # Default system prompt if file doesn't exist
-            return """You are an expert F1 race strategist providing real-time tactical advice during a live race.
 
-CONTEXT:
-- 2026 F1 regulations with 50/50 ICE/Electric power split (350kW MGU-K)
-- Battery, tire, and fuel management are critical
-- 6 strategic variables control car behavior
+# ==========================================
+# CONVENIENCE FUNCTIONS
+# ==========================================
 
-YOUR ROLE:
-The driver has paused the race at a critical decision point. You have simulation data for 3 possible strategies (100 races each).
+_default_advisor: Optional[GameAdvisor] = None
+_default_advisor_lock = threading.Lock()
 
-YOUR TASK:
-1. Recommend the TOP 2 strategies with highest success probability
-2. Identify the WORST 1 strategy to AVOID
-3. Be DECISIVE and ACTIONABLE - output ONLY valid JSON
 
-Consider race context, current position, resource states, and strategic implications of the current event."""
+def get_advisor() -> GameAdvisor:
+    """
+    Process-wide GameAdvisor, created on first use.
 
+    Reusing it skips re-configuring Gemini and rebuilding the model on every
+    call, and lets repeated calls share its response cache.
+    """
+    global _default_advisor
+    if _default_advisor is None:
+        with _default_advisor_lock:
+            if _default_advisor is None:
+                _default_advisor = GameAdvisor()
+    return _default_advisor
 
-# ==========================================
-# CONVENIENCE FUNCTIONS
-# ==========================================
 
 def quick_analyze(
     sim_results: pd.DataFrame,
@@ -588,5 +1189,4 @@ def quick_analyze(
 
         recommendations = quick_analyze(sim_df, context, strategies)
     """
-    advisor = GameAdvisor()
-    return advisor.analyze_decision_point(sim_results, race_context, strategy_params)
+    return get_advisor().analyze_decision_point(sim_results, race_context, strategy_params)
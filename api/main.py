@@ -1,26 +1,45 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
 import os
 import asyncio
 import multiprocessing as mp
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dotenv import load_dotenv
 import time
-import glob
-import json
+import tempfile
+import traceback
+import orjson
+import numpy as np
+from collections import Counter
+from functools import lru_cache
+
+# Everything the handlers use is imported here, once, at startup: the first
+# request after boot doesn't pay for importing pandas/pyarrow/the simulator
+# (sim.agents, which fails to import in this tree, stays local to /validate)
+from api.runner import worker_context, run_simulations, race_winner
+from api.analysis import RUN_FILE_SUFFIXES, aggregate_results, get_latest_run
+from api.gemini import synthesize_playbook
+from api.recommend import get_recommendations_fast
+from api.perf import get_performance_metrics, run_benchmark
+from api.game_sessions import session_manager, GameState, snapshot_player, snapshot_opponents
+from sim.scenarios import generate_scenarios
+from sim.game_loop import GameLoopOrchestrator
 
 load_dotenv()
 
-# Multiprocessing setup (macOS safe)
-MP_CTX = mp.get_context("spawn")
+# Multiprocessing setup (spawn on macOS, preloaded forkserver elsewhere)
+MP_CTX = worker_context()
 MAX_WORKERS = int(os.getenv("MAX_WORKERS") or min(mp.cpu_count(), 8))
 EXECUTOR = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=MP_CTX)
 
 # Thread pool for I/O-bound tasks
 THREAD_EXECUTOR = ThreadPoolExecutor(max_workers=4)
 
-app = FastAPI(title="Strategy Gym 2026")
+# Responses are encoded with orjson rather than the stdlib json module
+app = FastAPI(title="Strategy Gym 2026", default_response_class=ORJSONResponse)
 
 # CORS configuration
 cors_allow_all = os.getenv("CORS_ALLOW_ALL", "true").lower() == "true"
@@ -44,6 +63,8 @@ class ApiError(BaseModel):
 
 # Request/Response models
 class RunRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     num_scenarios: int = 100
     num_agents: int = 8
     repeats: int = 1
@@ -59,6 +80,8 @@ class AnalyzeResponse(BaseModel):
     playbook_preview: dict
 
 class RecommendRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     lap: int
     battery_soc: float
     position: int
@@ -75,6 +98,10 @@ class RecommendResponse(BaseModel):
     seed: int
     conditions_evaluated: list
 
+# /recommend validates its raw body in one pydantic-core pass (JSON parsing
+# included) instead of FastAPI's json.loads + per-field model validation
+RECOMMEND_REQUEST_ADAPTER = TypeAdapter(RecommendRequest)
+
 # Ensure directories exist
 os.makedirs("data", exist_ok=True)
 os.makedirs("runs", exist_ok=True)
@@ -82,17 +109,15 @@ os.makedirs("runs", exist_ok=True)
 @app.post("/run", response_model=RunResponse)
 async def run_simulation(req: RunRequest):
     """Non-blocking simulation runner"""
-    from api.runner import run_simulations
-    
     loop = asyncio.get_running_loop()
     try:
-        run_id, csv_path, elapsed = await loop.run_in_executor(
+        run_id, run_path, elapsed = await loop.run_in_executor(
             EXECUTOR, run_simulations, req.num_scenarios, req.repeats, MAX_WORKERS
         )
         return RunResponse(
             run_id=run_id, 
             scenarios_completed=req.num_scenarios, 
-            csv_path=csv_path, 
+            csv_path=run_path, 
             elapsed_sec=elapsed
         )
     except Exception as e:
@@ -101,29 +126,38 @@ async def run_simulation(req: RunRequest):
             detail={"code": 500, "message": "Simulation failed", "detail": str(e)}
         )
 
+def read_json(path: str):
+    """Load a JSON file (blocking; handlers call it through asyncio.to_thread)"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+def analyze_latest_run() -> tuple:
+    """Blocking part of /analyze: summarize the latest run and cache a new playbook"""
+    # Get latest CSV
+    csv_path = get_latest_run()
+    
+    # Aggregate stats (memoized per run file, so re-analyzing an unchanged
+    # run does not re-read it)
+    stats = aggregate_results(csv_path)
+    
+    # Call Gemini synthesis (it builds from the stats alone, so the lap
+    # rows are not loaded for it)
+    playbook = synthesize_playbook(stats, None)
+    
+    # Cache playbook with atomic write
+    with tempfile.NamedTemporaryFile(mode='wb', suffix='.json', delete=False) as tmp:
+        tmp.write(orjson.dumps(playbook, option=orjson.OPT_INDENT_2))
+        os.replace(tmp.name, 'data/playbook.json')
+    
+    return stats, playbook
+
 @app.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_runs():
     """Analyze latest run and generate playbook"""
-    from api.analysis import get_latest_run, aggregate_results
-    from api.gemini import synthesize_playbook
-    import pandas as pd
-    
     try:
-        # Get latest CSV
-        csv_path = get_latest_run()
-        
-        # Aggregate stats
-        stats = aggregate_results(csv_path)
-        
-        # Call Gemini synthesis
-        df = pd.read_csv(csv_path)
-        playbook = synthesize_playbook(stats, df)
-        
-        # Cache playbook with atomic write
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as tmp:
-            json.dump(playbook, tmp, indent=2)
-            os.replace(tmp.name, 'data/playbook.json')
+        # CSV parsing and the Gemini call block for seconds: run them in a
+        # worker thread so other requests and game sockets keep being served
+        stats, playbook = await asyncio.to_thread(analyze_latest_run)
         
         return AnalyzeResponse(
             stats=stats,
@@ -134,8 +168,7 @@ async def analyze_runs():
     except Exception as e:
         # Return last cached playbook if analysis fails
         if os.path.exists('data/playbook.json'):
-            with open('data/playbook.json', 'r') as f:
-                playbook = json.load(f)
+            playbook = await asyncio.to_thread(read_json, 'data/playbook.json')
             return AnalyzeResponse(
                 stats={},
                 playbook_preview={"cached": True, "num_rules": len(playbook.get('rules', []))}
@@ -148,29 +181,38 @@ async def get_playbook():
     if not os.path.exists('data/playbook.json'):
         raise HTTPException(status_code=404, detail="No playbook generated yet")
     
-    with open('data/playbook.json', 'r') as f:
-        return json.load(f)
-
-@app.post("/recommend", response_model=RecommendResponse)
-async def recommend(req: RecommendRequest):
+    # The file already holds the response body: stream it as-is instead of
+    # decoding and re-encoding it (FileResponse reads it off the event loop)
+    return FileResponse('data/playbook.json', media_type="application/json")
+
+@app.post(
+    "/recommend",
+    response_model=RecommendResponse,
+    # The body is read by hand, so document it explicitly
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": RecommendRequest.model_json_schema()}}
+    }}
+)
+async def recommend(request: Request):
     """Fast recommendation with transparency"""
-    from api.recommend import get_recommendations_fast
+    try:
+        req = RECOMMEND_REQUEST_ADAPTER.validate_json(await request.body())
+    except ValidationError as e:
+        # Same 422 response FastAPI gives for an invalid body
+        raise RequestValidationError([
+            {**error, 'loc': ('body', *error['loc'])}
+            for error in e.errors(include_url=False)
+        ])
     
-    start = time.time()
+    # Latency on the monotonic clock (immune to NTP steps); one wall-clock
+    # read for the timestamp
+    start_ns = time.perf_counter_ns()
     
-    state = {
-        'lap': req.lap,
-        'battery_soc': req.battery_soc,
-        'position': req.position,
-        'rain': req.rain,
-        'tire_age': req.tire_age,
-        'tire_life': req.tire_life,
-        'fuel_remaining': req.fuel_remaining,
-        'boost_used': req.boost_used
-    }
+    state = req.model_dump()
     
     recommendations, conditions_evaluated, seed = get_recommendations_fast(state)
-    elapsed_ms = (time.time() - start) * 1000
+    elapsed_ms = (time.perf_counter_ns() - start_ns) / 1e6
     
     return RecommendResponse(
         recommendations=recommendations,
@@ -183,17 +225,16 @@ async def recommend(req: RecommendRequest):
 @app.post("/validate")
 async def run_validation():
     """Run validation scenarios with adaptive AI"""
-    import numpy as np
-    from sim.scenarios import generate_scenarios
+    # Imported here rather than at module top: sim.agents targets the legacy
+    # Agent base class that sim.engine no longer exports, so importing it
+    # eagerly would stop the whole app from starting
     from sim.agents import create_agents, AdaptiveAI
-    from sim.engine import simulate_race
     
     # Load playbook
     if not os.path.exists('data/playbook.json'):
         raise HTTPException(status_code=400, detail="No playbook to validate")
     
-    with open('data/playbook.json', 'r') as f:
-        playbook = json.load(f)
+    playbook = await asyncio.to_thread(read_json, 'data/playbook.json')
     
     # Generate NEW scenarios
     np.random.seed(9999)
@@ -207,10 +248,15 @@ async def run_validation():
     # Run validation
     wins_by_agent = {a if isinstance(a, str) else a.name: 0 for a in agents}
     
-    for scenario in scenarios:
-        df = simulate_race(scenario, agents)
-        winner = df[df['won'] == 1]['agent'].iloc[0]
-        wins_by_agent[winner] += 1
+    # Races are independent: run them in parallel on the
+    # process pool instead of serially on the event loop. Workers send back
+    # just the winner's name rather than each race's full DataFrame
+    loop = asyncio.get_running_loop()
+    winners = await asyncio.gather(*[
+        loop.run_in_executor(EXECUTOR, race_winner, scenario, agents)
+        for scenario in scenarios
+    ])
+    wins_by_agent.update(Counter(w for w in winners if w is not None))
     
     adaptive_wins = wins_by_agent['Adaptive_AI']
     baseline_wins = [w for a, w in wins_by_agent.items() if a != 'Adaptive_AI']
@@ -229,7 +275,6 @@ async def run_validation():
 @app.get("/perf")
 async def get_performance():
     """Get system performance metrics"""
-    from api.perf import get_performance_metrics
     return get_performance_metrics()
 
 @app.post("/benchmark")
@@ -246,31 +291,63 @@ async def run_benchmark_endpoint(num_scenarios: int = 1000):
             }
         )
     
-    from api.perf import run_benchmark
     return run_benchmark(num_scenarios)
 
+def run_index() -> tuple:
+    """(run log paths newest first, run results paths in name order) in runs/"""
+    # Adding or removing a run bumps the directory mtime, which invalidates the cache
+    return _run_index(os.stat('runs').st_mtime_ns)
+
+@lru_cache(maxsize=1)
+def _run_index(runs_mtime_ns: int) -> tuple:
+    log_files = []
+    run_files = []
+    with os.scandir('runs') as entries:
+        for entry in entries:
+            if entry.name.endswith('.json'):
+                log_files.append(entry.path)
+            elif entry.name.endswith(RUN_FILE_SUFFIXES):
+                run_files.append(entry.path)
+    log_files.sort(reverse=True)
+    run_files.sort()
+    return tuple(log_files), tuple(run_files)
+
+@lru_cache(maxsize=1024)
+def _log_summary(log_file: str, mtime_ns: int) -> dict | None:
+    """Listing entry for one run log (None if unreadable), parsed once per file version"""
+    try:
+        data = read_json(log_file)
+        return {
+            "log_id": data["run_id"],
+            "run_id": data["run_id"],
+            "created_utc": data["created_utc"],
+            "scenarios": data["scenarios"],
+            "duration_sec": data["duration_sec"],
+            "verdict": data.get("verdict"),
+            "probability": data.get("probability")
+        }
+    except (orjson.JSONDecodeError, KeyError):
+        return None
+
 @app.get("/logs")
 async def get_logs(offset: int = 0, limit: int = 50):
     """List run logs with pagination"""
-    log_files = sorted(glob.glob("runs/*.json"), reverse=True)
+    return await asyncio.to_thread(list_logs, offset, limit)
+
+def list_logs(offset: int, limit: int) -> dict:
+    """Blocking part of /logs: one page of run log summaries"""
+    log_files, _ = run_index()
     total = len(log_files)
     
+    # Only the requested page is stat'ed (and parsed, on first sight)
     items = []
     for log_file in log_files[offset:offset+limit]:
         try:
-            with open(log_file, 'r') as f:
-                data = json.load(f)
-                items.append({
-                    "log_id": data["run_id"],
-                    "run_id": data["run_id"],
-                    "created_utc": data["created_utc"],
-                    "scenarios": data["scenarios"],
-                    "duration_sec": data["duration_sec"],
-                    "verdict": data.get("verdict"),
-                    "probability": data.get("probability")
-                })
-        except (json.JSONDecodeError, KeyError):
+            summary = _log_summary(log_file, os.stat(log_file).st_mtime_ns)
+        except FileNotFoundError:
             continue
+        if summary is not None:
+            items.append(summary)
     
     return {"total": total, "items": items}
 
@@ -281,17 +358,17 @@ async def get_log_detail(log_id: str):
     if not os.path.exists(log_path):
         raise HTTPException(status_code=404, detail="Log not found")
     
-    with open(log_path, 'r') as f:
-        return json.load(f)
+    return FileResponse(log_path, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    _, run_files = run_index()
     return {
         "status": "ok",
         "playbook_exists": os.path.exists('data/playbook.json'),
-        "latest_run": max(glob.glob('runs/*.csv'), default=None),
-        "num_runs": len(glob.glob('runs/*.csv')),
+        "latest_run": run_files[-1] if run_files else None,
+        "num_runs": len(run_files),
         "max_workers": MAX_WORKERS
     }
 
@@ -300,10 +377,19 @@ async def health_check():
 # GAME MODE - WEBSOCKET ENDPOINT
 # ==========================================
 
-from fastapi import WebSocket, WebSocketDisconnect
-from api.game_sessions import session_manager, GameState
-from sim.game_loop import GameLoopOrchestrator
-from dataclasses import asdict
+# numpy scalars can reach the car snapshots from the physics code
+WS_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+
+async def send_frame(websocket: WebSocket, message: dict):
+    """
+    Send a message as a JSON text frame, encoded with orjson.
+
+    The web client JSON.parse()s text frames, so the frame type stays the
+    same as send_json's; only the encoder (the cost of every 10 Hz
+    LAP_UPDATE) changes.
+    """
+    await websocket.send_text(orjson.dumps(message, option=WS_JSON_OPTIONS).decode())
 
 
 def generate_heuristic_recommendations(current_state, event_type: str) -> dict:
@@ -522,8 +608,6 @@ async def game_websocket(websocket: WebSocket, session_id: str):
     - DECISION_POINT: Pause for player decision with recommendations
     - RACE_COMPLETE: Race finished
     """
-    import traceback
-
     print(f"✓ WebSocket connection attempt: {session_id}")
     await websocket.accept()
     print(f"✓ WebSocket accepted: {session_id}")
@@ -575,12 +659,12 @@ async def game_websocket(websocket: WebSocket, session_id: str):
                 orchestrator = GameLoopOrchestrator(game_state)
 
                 # Send RACE_STARTED message
-                await websocket.send_json({
+                await send_frame(websocket, {
                     'type': 'RACE_STARTED',
                     'session_id': new_session_id,
                     'total_laps': total_laps,
-                    'player': asdict(game_state.player),
-                    'opponents': [asdict(opp) for opp in game_state.opponents]
+                    'player': snapshot_player(game_state.player),
+                    'opponents': snapshot_opponents(game_state.opponents)
                 })
 
                 # Start auto-advancing laps as BACKGROUND TASK (non-blocking)
@@ -593,7 +677,7 @@ async def game_websocket(websocket: WebSocket, session_id: str):
             # ==========================================
             elif message_type == 'SELECT_STRATEGY':
                 if not orchestrator:
-                    await websocket.send_json({
+                    await send_frame(websocket, {
                         'type': 'ERROR',
                         'message': 'No active game session'
                     })
@@ -609,7 +693,7 @@ async def game_websocket(websocket: WebSocket, session_id: str):
                     game_state.current_decision_point = None
 
                     # Send confirmation
-                    await websocket.send_json({
+                    await send_frame(websocket, {
                         'type': 'STRATEGY_APPLIED',
                         'strategy_id': strategy_id
                     })
@@ -618,7 +702,7 @@ async def game_websocket(websocket: WebSocket, session_id: str):
                     # This will unblock the await pause_event.wait() in run_race_loop
                     game_state.pause_event.set()
                 else:
-                    await websocket.send_json({
+                    await send_frame(websocket, {
                         'type': 'ERROR',
                         'message': 'Invalid strategy selection'
                     })
@@ -648,7 +732,7 @@ async def game_websocket(websocket: WebSocket, session_id: str):
             race_task.cancel()
 
         try:
-            await websocket.send_json({
+            await send_frame(websocket, {
                 'type': 'ERROR',
                 'message': 'Game error',
                 'details': str(e)
@@ -786,11 +870,11 @@ async def run_race_loop(websocket: WebSocket, orchestrator: GameLoopOrchestrator
 
             # Check if race is complete
             if lap_result.get('race_complete'):
-                await websocket.send_json({
+                await send_frame(websocket, {
                     'type': 'RACE_COMPLETE',
                     'final_position': lap_result['final_position'],
-                    'player': asdict(game_state.player),
-                    'opponents': [asdict(opp) for opp in game_state.opponents],
+                    'player': snapshot_player(game_state.player),
+                    'opponents': snapshot_opponents(game_state.opponents),
                     'decision_count': len(game_state.decision_history),
                     'race_summary': {
                         'total_laps': game_state.total_laps,
@@ -804,11 +888,11 @@ async def run_race_loop(websocket: WebSocket, orchestrator: GameLoopOrchestrator
             update_accum = 0.0
 
             # Send lap update to client (includes speed, gap_to_leader, lap_progress from game_loop)
-            await websocket.send_json({
+            await send_frame(websocket, {
                 'type': 'LAP_UPDATE',
                 'lap': game_state.current_lap,
-                'player': asdict(game_state.player),
-                'opponents': [asdict(opp) for opp in game_state.opponents],
+                'player': snapshot_player(game_state.player),
+                'opponents': snapshot_opponents(game_state.opponents),
                 'is_raining': game_state.is_raining,
                 'safety_car_active': game_state.safety_car_active,
                 'server_timestamp': now  # For frontend interpolation sync
@@ -841,7 +925,7 @@ async def run_race_loop(websocket: WebSocket, orchestrator: GameLoopOrchestrator
                 print(f"[DEMO] ℹ️  Pre-compute finished in background (not used, for metrics only)")
 
             # Send decision point to client
-            await websocket.send_json({
+            await send_frame(websocket, {
                 'type': 'DECISION_POINT',
                 'event_type': event_type,
                 'lap': current_state.lap,
@@ -878,8 +962,12 @@ async def run_race_loop(websocket: WebSocket, orchestrator: GameLoopOrchestrator
             # Reset monotonic clock baseline after pause to prevent dt spike
             last = time.perf_counter()
 
-        # Cooperative yield to event loop
-        await asyncio.sleep(0.002)
+        # Nothing happens between broadcasts and lap advances, so sleep until
+        # the next one is due instead of waking every few milliseconds
+        await asyncio.sleep(max(
+            0.002,
+            min(UPDATE_INTERVAL - update_accum, LAP_TIME_DEMO - lap_accum)
+        ))
 
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ import json
 import os
 import time
 import random
+from functools import lru_cache
 from fastapi import HTTPException
 
 # AST whitelist for safe evaluation
@@ -19,18 +20,23 @@ try:
 except AttributeError:
     pass  # Python 3.8+ uses ast.Constant
 
+@lru_cache(maxsize=256)
+def compile_condition(condition: str):
+    """Parse, whitelist-check and compile a condition once per distinct string"""
+    tree = ast.parse(condition, mode='eval')
+    
+    # Check all nodes are whitelisted
+    for node in ast.walk(tree):
+        if type(node) not in ALLOWED_NODES:
+            raise ValueError(f"Unsafe node type: {type(node).__name__}")
+    
+    return compile(tree, '<condition>', 'eval')
+
 def safe_eval_condition(condition: str, context: dict) -> bool:
     """Safely evaluate condition using AST parsing"""
     try:
-        tree = ast.parse(condition, mode='eval')
-        
-        # Check all nodes are whitelisted
-        for node in ast.walk(tree):
-            if type(node) not in ALLOWED_NODES:
-                raise ValueError(f"Unsafe node type: {type(node).__name__}")
-        
-        # Compile and evaluate
-        code = compile(tree, '<condition>', 'eval')
+        # Evaluate the cached code object
+        code = compile_condition(condition)
         return bool(eval(code, {"__builtins__": {}}, context))
     except Exception as e:
         print(f"Condition evaluation failed: {condition}, error: {e}")
@@ -38,25 +44,31 @@ def safe_eval_condition(condition: str, context: dict) -> bool:
 
 def get_recommendations_fast(state: dict):
     """Fast recommendation with transparency"""
-    if not os.path.exists('data/playbook.json'):
+    try:
+        playbook_mtime_ns = os.stat('data/playbook.json').st_mtime_ns
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="No playbook available")
     
-    with open('data/playbook.json', 'r') as f:
-        playbook = json.load(f)
+    # Keyed on the exact state: conditions must see the values the client
+    # sent, or a state just under a threshold could match as if it were on it
+    state_key = tuple(state.items())
+    playbook = _load_playbook(playbook_mtime_ns)
+    # A new playbook has a new mtime, so matches for the old one are never reused
+    matches = _matched_rules(playbook_mtime_ns, state_key)
     
+    # Responses are built fresh on every call, so callers never share (or
+    # mutate) the cached matches or the playbook's own action dicts
     recommendations = []
     conditions_evaluated = []
     seed = random.randint(1000, 9999)
     
-    for rule in playbook.get('rules', []):
-        condition = rule['condition']
-        matched = safe_eval_condition(condition, state)
-        conditions_evaluated.append({"condition": condition, "matched": matched})
+    for rule, matched in zip(playbook.get('rules', []), matches):
+        conditions_evaluated.append({"condition": rule['condition'], "matched": matched})
         
         if matched:
             recommendations.append({
                 'rule': rule['rule'],
-                'action': rule['action'],
+                'action': dict(rule['action']),
                 'confidence': rule['confidence'],
                 'rationale': rule['rationale']
             })
@@ -77,4 +89,16 @@ def get_recommendations_fast(state: dict):
             'rationale': 'No conditions matched, using default balanced strategy'
         }]
     
-    return recommendations, conditions_evaluated, seed
\ No newline at end of file
+    return recommendations, conditions_evaluated, seed
+
+@lru_cache(maxsize=1)
+def _load_playbook(mtime_ns: int) -> dict:
+    with open('data/playbook.json', 'r') as f:
+        return json.load(f)
+
+@lru_cache(maxsize=4096)
+def _matched_rules(playbook_mtime_ns: int, state_key: tuple) -> tuple:
+    """Whether each playbook rule's condition holds for the state"""
+    playbook = _load_playbook(playbook_mtime_ns)
+    state = dict(state_key)
+    return tuple(safe_eval_condition(rule['condition'], state) for rule in playbook.get('rules', []))
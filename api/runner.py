@@ -4,9 +4,26 @@ import uuid
 import time
 import tempfile
 import os
+import sys
 import json
-from datetime import datetime
-from typing import Tuple
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+# Modules a simulation worker needs, imported once by the forkserver so
+# forked workers start with them already loaded
+WORKER_PRELOAD = ["numpy", "pandas", "sim.engine", "sim.scenarios", "sim.agents", "sim.agents_v2"]
+
+def worker_context():
+    """Multiprocessing context for simulation workers"""
+    # macOS (fork is unsafe with its system frameworks) and Windows (no
+    # forkserver): spawn. Elsewhere a forkserver with the simulation stack
+    # preloaded, so each worker does not re-import numpy/pandas/sim the way a
+    # spawned one does
+    if sys.platform == "darwin" or "forkserver" not in mp.get_all_start_methods():
+        return mp.get_context("spawn")
+    ctx = mp.get_context("forkserver")
+    ctx.set_forkserver_preload(WORKER_PRELOAD)
+    return ctx
 
 def run_single_scenario(args: Tuple) -> pd.DataFrame:
     """Top-level worker function for multiprocessing"""
@@ -17,6 +34,24 @@ def run_single_scenario(args: Tuple) -> pd.DataFrame:
     df['scenario_id'] = scenario_id
     return df
 
+def run_scenario_shard(args: Tuple) -> pd.DataFrame:
+    """Top-level worker function: run a contiguous shard of scenarios"""
+    tasks, agents = args
+    return pd.concat(
+        [run_single_scenario((scenario_id, scenario, agents)) for scenario_id, scenario in tasks],
+        ignore_index=True
+    )
+
+def race_winner(scenario: dict, agents: list) -> Optional[str]:
+    """Top-level worker function: name of the winning agent of one race (None if nobody won)"""
+    from sim.engine import simulate_race
+    df = simulate_race(scenario, agents)
+    # Only the winner's rows are flagged, so the first flagged row names it
+    won = df['won'].to_numpy()
+    if not won.any():
+        return None
+    return df['agent'].to_numpy()[won.argmax()]
+
 def run_simulations(num_scenarios: int, num_repeats: int, max_workers: int) -> Tuple[str, str, float]:
     """Run simulations with spawn-safe multiprocessing"""
     from sim.scenarios import generate_scenarios
@@ -26,36 +61,44 @@ def run_simulations(num_scenarios: int, num_repeats: int, max_workers: int) -> T
     scenarios = generate_scenarios(num_scenarios)
     agents = create_agents_v2()  # Use new 6-variable agents
     
-    tasks = [(f"S{i:04d}_{r}", scenarios[i], agents)
+    tasks = [(f"S{i:04d}_{r}", scenarios[i])
              for i in range(num_scenarios)
              for r in range(num_repeats)]
     
-    # Use spawn context for macOS safety
-    mp_ctx = mp.get_context("spawn")
-    with mp_ctx.Pool(processes=max_workers) as pool:
-        results = pool.map(run_single_scenario, tasks)
+    # Contiguous shards, about four per worker: the agents are pickled once
+    # per shard instead of once per scenario, and a worker that draws slow
+    # races picks up fewer shards. pool.map keeps shard order, so rows stay
+    # in task order
+    shard_size = -(-len(tasks) // (4 * max(1, max_workers)))
+    shards = [(tasks[i:i + shard_size], agents) for i in range(0, len(tasks), shard_size)]
+    
+    with worker_context().Pool(processes=max_workers) as pool:
+        results = pool.map(run_scenario_shard, shards, chunksize=1)
     
     df = pd.concat(results, ignore_index=True)
     
-    # Atomic write with UTC timestamp
-    run_id = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    # Atomic write with UTC timestamp (one clock read for the id and the summary)
+    created_utc = datetime.now(timezone.utc)
+    run_id = f"{created_utc.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
     
-    # Write CSV atomically
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp:
-        df.to_csv(tmp.name, index=False)
-        csv_path = f"runs/{run_id}.csv"
-        os.replace(tmp.name, csv_path)
+    # Write results atomically as Parquet: typed, columnar and compressed, so
+    # /analyze reads only the columns it needs without parsing text
+    # (the run summary and API responses keep the csv_path field name)
+    with tempfile.NamedTemporaryFile(suffix='.parquet', delete=False) as tmp:
+        df.to_parquet(tmp.name, engine='pyarrow', compression='zstd', index=False)
+        run_path = f"runs/{run_id}.parquet"
+        os.replace(tmp.name, run_path)
     
     elapsed = time.time() - start_time
     
     # Write run summary atomically
     summary = {
         "run_id": run_id,
-        "created_utc": datetime.utcnow().isoformat(),
+        "created_utc": created_utc.isoformat(),
         "scenarios": num_scenarios,
         "repeats": num_repeats,
         "duration_sec": elapsed,
-        "csv_path": csv_path,
+        "csv_path": run_path,
         "scenarios_per_sec": num_scenarios / elapsed if elapsed > 0 else 0
     }
     
@@ -66,6 +109,6 @@ def run_simulations(num_scenarios: int, num_repeats: int, max_workers: int) -> T
     
     print(f"✓ Completed {num_scenarios} scenarios in {elapsed:.2f}s")
     print(f"  Rate: {num_scenarios/elapsed:.1f} scenarios/sec")
-    print(f"  Saved to: {csv_path}")
+    print(f"  Saved to: {run_path}")
     
-    return run_id, csv_path, elapsed
\ No newline at end of file
+    return run_id, run_path, elapsed
\ No newline at end of file
@@ -27,7 +27,7 @@ def main():
     print("-" * 60)
 
     start_time = time.time()
-    run_id, csv_path, elapsed = run_simulations(
+    run_id, run_path, elapsed = run_simulations(
         num_scenarios=5,
         num_repeats=2,
         max_workers=2
@@ -36,14 +36,14 @@ def main():
 
     print(f"\n✓ Multiprocessing completed successfully")
     print(f"  Run ID: {run_id}")
-    print(f"  CSV path: {csv_path}")
+    print(f"  Run path: {run_path}")
     print(f"  Reported time: {elapsed:.2f}s")
     print(f"  Total time: {total_time:.2f}s")
 
     # Load and verify results
-    df = pd.read_csv(csv_path)
+    df = pd.read_parquet(run_path)
 
-    print(f"\n✓ Results loaded from CSV")
+    print(f"\n✓ Results loaded from Parquet")
     print(f"  Total rows: {len(df)}")
     print(f"  Scenarios: {df['scenario_id'].nunique()}")
     print(f"  Agents: {df['agent'].nunique()}")
@@ -77,7 +77,7 @@ def main():
     print("-" * 60)
 
     start_time = time.time()
-    run_id2, csv_path2, elapsed2 = run_simulations(
+    run_id2, run_path2, elapsed2 = run_simulations(
         num_scenarios=10,
         num_repeats=3,
         max_workers=4
@@ -89,7 +89,7 @@ def main():
     print(f"  Reported time: {elapsed2:.2f}s")
     print(f"  Total time: {total_time2:.2f}s")
 
-    df2 = pd.read_csv(csv_path2)
+    df2 = pd.read_parquet(run_path2)
     print(f"  Total rows: {len(df2)}")
     print(f"  Scenarios: {df2['scenario_id'].nunique()}")
 
@@ -105,7 +105,7 @@ def main():
     print("  - spawn-safe multiprocessing works")
     print("  - New engine is picklable")
     print("  - All 15 columns correctly saved")
-    print("  - CSV atomic writes working")
+    print("  - Parquet atomic writes working")
     print("  - Parallel execution functional")
 
     return True
@@ -6,9 +6,17 @@ Each agent demonstrates a unique approach to managing the battery/ICE power spli
 under the 2026 regulations.
 """
 
+from functools import lru_cache
+
 from sim.engine import Agent, RaceState
 
 
+@lru_cache(maxsize=256)
+def compile_condition(condition: str):
+    """Compile a playbook condition once; rules are re-evaluated every lap"""
+    return compile(condition, '<condition>', 'eval')
+
+
 class ElectricBlitz(Agent):
     """
     Aggressive early deployment strategy.
@@ -266,7 +274,7 @@ class AdaptiveAI(Agent):
 
             # Restricted eval: no builtins, only state variables
             # This prevents code injection while allowing condition evaluation
-            result = eval(condition, {"__builtins__": {}}, context)
+            result = eval(compile_condition(condition), {"__builtins__": {}}, context)
 
             return bool(result)
 
@@ -20,6 +20,12 @@ import random
 from pathlib import Path
 from typing import Dict, Any
 
+# The six strategic variables a playbook action may set
+STRATEGY_KEYS = (
+    'energy_deployment', 'tire_management', 'fuel_strategy',
+    'ers_mode', 'overtake_aggression', 'defense_intensity'
+)
+
 
 class AgentV2:
     """Base class for all agents using 6-variable decision system."""
@@ -488,29 +494,29 @@ class AdaptiveAI(AgentV2):
         # Start with base profile
         decision_dict = self.profile.copy()
 
+        # Safe eval with restricted context (state is fixed for the whole rule scan)
+        safe_vars = {
+            'battery_soc': state.battery_soc,
+            'lap': state.lap,
+            'position': state.position,
+            'tire_age': state.tire_age,
+            'tire_life': state.tire_life,
+            'fuel_remaining': state.fuel_remaining,
+            'boost_used': state.boost_used
+        }
+        restricted_globals = {"__builtins__": {}}
+
         # Apply playbook rules
         for rule in self.playbook.get('rules', []):
             condition = rule.get('condition', '')
             action = rule.get('action', {})
 
-            # Safe eval with restricted context
-            safe_vars = {
-                'battery_soc': state.battery_soc,
-                'lap': state.lap,
-                'position': state.position,
-                'tire_age': state.tire_age,
-                'tire_life': state.tire_life,
-                'fuel_remaining': state.fuel_remaining,
-                'boost_used': state.boost_used
-            }
-
             try:
                 # Evaluate condition safely
-                if eval(condition, {"__builtins__": {}}, safe_vars):
+                if eval(condition, restricted_globals, safe_vars):
                     # Apply action (update decision)
                     # Only update if action contains valid keys
-                    for key in ['energy_deployment', 'tire_management', 'fuel_strategy',
-                               'ers_mode', 'overtake_aggression', 'defense_intensity']:
+                    for key in STRATEGY_KEYS:
                         if key in action:
                             decision_dict[key] = action[key]
             except:
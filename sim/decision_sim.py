@@ -157,7 +157,7 @@ def run_decision_simulations(
             race_df = simulate_race(scenario, agents, use_2026_rules=use_2026_rules)
 
             # Extract player's results
-            player_data = race_df[race_df['agent'] == 'Player'].copy()
+            player_data = race_df[race_df['agent'] == 'Player']
 
             # Get final lap statistics
             final_lap_data = player_data[player_data['lap'] == remaining_laps].iloc[0]
@@ -235,13 +235,12 @@ def calculate_final_positions(df: pd.DataFrame, num_laps: int) -> pd.DataFrame:
         DataFrame with final_position and won columns added
     """
     # Get final cumulative times (last lap)
-    final_lap = df[df['lap'] == num_laps].copy()
-    final_lap = final_lap.sort_values('cumulative_time')
+    # Only the two columns needed for ranking; sort_values returns a new frame, so no copy
+    final_lap = df.loc[df['lap'] == num_laps, ['agent', 'cumulative_time']].sort_values('cumulative_time')
 
-    # Create position mapping - use enumerate to get correct position
-    position_map = {}
-    for position, (_, row) in enumerate(final_lap.iterrows(), start=1):
-        position_map[row['agent']] = position
+    # Create position mapping from the sorted agent column (no per-row Series)
+    agents = final_lap['agent'].to_numpy()
+    position_map = dict(zip(agents, range(1, len(agents) + 1)))
 
     # Add to DataFrame
     df['final_position'] = df['agent'].map(position_map)
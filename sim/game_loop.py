@@ -6,7 +6,6 @@ Runs lap-by-lap race simulation with decision point pauses.
 import asyncio
 import numpy as np
 from typing import Dict, Optional, List
-from dataclasses import asdict
 
 from sim.quick_sim import (
     RaceState,
@@ -15,7 +14,30 @@ from sim.quick_sim import (
     check_decision_point
 )
 from api.gemini_game_advisor import GameAdvisor
-from api.game_sessions import GameState, PlayerState, OpponentState
+from api.game_sessions import (
+    GameState, PlayerState, OpponentState, snapshot_player, snapshot_opponents
+)
+
+
+# Fixed AI strategy tendencies (energy, tire_mgmt, fuel_strat, ers),
+# matched by substring of agent_type in priority order
+OPPONENT_STRATEGY_PROFILES = (
+    ('Verstappen', (70, 80, 70, 70)),
+    ('Hamilton', (60, 90, 75, 65)),
+    ('Alonso', (55, 85, 80, 75)),
+    ('Aggressive', (85, 60, 55, 80)),
+    ('Tire', (50, 95, 75, 60)),
+    ('Energy', (90, 70, 60, 85)),
+)
+BALANCED_STRATEGY_PROFILE = (60, 75, 70, 65)
+
+
+def opponent_strategy_profile(agent_type: str) -> tuple:
+    """Get the fixed strategy tendency for an AI agent type"""
+    for marker, profile in OPPONENT_STRATEGY_PROFILES:
+        if marker in agent_type:
+            return profile
+    return BALANCED_STRATEGY_PROFILE
 
 
 class GameLoopOrchestrator:
@@ -45,6 +67,11 @@ class GameLoopOrchestrator:
         self.lap_time_multiplier = float(os.getenv("LAP_TIME_MULTIPLIER", "5.0"))
         self.base_lap_time = 90.0
 
+        # Per-opponent strategy tendency, resolved once from agent_type
+        self._opponent_strategies = [
+            opponent_strategy_profile(opp.agent_type) for opp in game_state.opponents
+        ]
+
     def advance_lap(self) -> Dict:
         """
         Simulate one lap for all racers.
@@ -86,8 +113,8 @@ class GameLoopOrchestrator:
         return {
             'lap': lap,
             'race_complete': False,
-            'player': asdict(self.game_state.player),
-            'opponents': [asdict(opp) for opp in self.game_state.opponents],
+            'player': snapshot_player(self.game_state.player),
+            'opponents': snapshot_opponents(self.game_state.opponents),
             'is_raining': self.game_state.is_raining,
             'safety_car_active': self.game_state.safety_car_active
         }
@@ -165,26 +192,14 @@ class GameLoopOrchestrator:
         """Simulate laps for all AI opponents"""
         results = []
 
-        for opponent in self.game_state.opponents:
+        # A plain per-car loop: with a handful of opponents, packing their
+        # state into arrays every lap costs more than the arithmetic it saves
+        for opponent, (energy, tire_mgmt, fuel_strat, ers) in zip(
+            self.game_state.opponents, self._opponent_strategies
+        ):
             # AI opponents have fixed strategies based on their agent type
             # Simplified simulation for speed
 
-            # Get agent-specific strategy tendency
-            if 'Verstappen' in opponent.agent_type:
-                energy, tire_mgmt, fuel_strat, ers = 70, 80, 70, 70
-            elif 'Hamilton' in opponent.agent_type:
-                energy, tire_mgmt, fuel_strat, ers = 60, 90, 75, 65
-            elif 'Alonso' in opponent.agent_type:
-                energy, tire_mgmt, fuel_strat, ers = 55, 85, 80, 75
-            elif 'Aggressive' in opponent.agent_type:
-                energy, tire_mgmt, fuel_strat, ers = 85, 60, 55, 80
-            elif 'Tire' in opponent.agent_type:
-                energy, tire_mgmt, fuel_strat, ers = 50, 95, 75, 60
-            elif 'Energy' in opponent.agent_type:
-                energy, tire_mgmt, fuel_strat, ers = 90, 70, 60, 85
-            else:  # Balanced
-                energy, tire_mgmt, fuel_strat, ers = 60, 75, 70, 65
-
             # Battery dynamics (AMPLIFIED to match player)
             battery_drain = (energy / 100) * 1.2  # Increased from 0.8 to 1.2
             battery_gain = (ers / 100) * 0.8      # Increased from 0.6 to 0.8
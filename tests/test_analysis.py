@@ -0,0 +1,125 @@
+"""
+Equivalence tests for run aggregation (api/analysis.py).
+
+The vectorized aggregate_results is compared against the original
+per-agent pandas loop on a small fixture run.
+
+Usage:
+    pytest tests/test_analysis.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.analysis import aggregate_results, load_run, summarize_run, STRATEGY_VARIABLES
+
+AGENTS = ['Alpha', 'Bravo', 'Charlie']
+NUM_SCENARIOS = 4
+NUM_LAPS = 5
+
+
+def baseline_aggregate(csv_path):
+    """The original per-agent loop aggregate_results replaced"""
+    df = pd.read_csv(csv_path)
+    final_states = df.groupby(['scenario_id', 'agent']).tail(1)
+
+    stats = {}
+    total_scenarios = final_states['scenario_id'].nunique()
+
+    for agent in final_states['agent'].unique():
+        agent_data = final_states[final_states['agent'] == agent]
+        agent_all_laps = df[df['agent'] == agent]
+
+        stats[agent] = {
+            "wins": int(agent_data['won'].sum()),
+            "avg_position": float(agent_data['final_position'].mean()),
+            "win_rate": float(agent_data['won'].sum() / total_scenarios * 100),
+            "total_races": len(agent_data),
+            "avg_lap_time": float(agent_data['lap_time'].mean()),
+            "avg_final_battery": float(agent_data['battery_soc'].mean()),
+            "avg_final_tire_life": float(agent_data['tire_life'].mean()),
+            "avg_final_fuel": float(agent_data['fuel_remaining'].mean()),
+        }
+        for var in STRATEGY_VARIABLES:
+            stats[agent][f"avg_{var}"] = float(agent_all_laps[var].mean())
+
+    return stats
+
+
+def make_run(scenario_ids, winners=None):
+    """Lap-by-lap run rows shaped like sim.engine.simulate_race output"""
+    rng = np.random.default_rng(7)
+    rows = []
+    for s, scenario_id in enumerate(scenario_ids):
+        order = rng.permutation(len(AGENTS))
+        for a, agent in enumerate(AGENTS):
+            position = int(np.flatnonzero(order == a)[0]) + 1
+            won = position == 1 if winners is None else agent == winners[s]
+            for lap in range(1, NUM_LAPS + 1):
+                row = {
+                    'scenario_id': scenario_id,
+                    'agent': agent,
+                    'lap': lap,
+                    'won': won,
+                    'final_position': position,
+                    'lap_time': round(float(rng.uniform(88, 95)), 2),
+                    'battery_soc': round(float(rng.uniform(0, 100)), 2),
+                    'tire_life': round(float(rng.uniform(0, 100)), 2),
+                    'fuel_remaining': round(float(rng.uniform(0, 110)), 2),
+                }
+                for var in STRATEGY_VARIABLES:
+                    row[var] = round(float(rng.uniform(0, 100)), 1)
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def assert_stats_match(actual, expected):
+    assert set(actual) == set(expected)
+    for agent, agent_stats in expected.items():
+        assert set(actual[agent]) == set(agent_stats)
+        for field, value in agent_stats.items():
+            # Telemetry is read as float32, so allow float32 rounding
+            assert actual[agent][field] == pytest.approx(value, rel=1e-5), (agent, field)
+
+
+@pytest.mark.parametrize('scenario_ids', [
+    [f"S{i:04d}_0" for i in range(NUM_SCENARIOS)],  # runner ids (strings)
+    list(range(NUM_SCENARIOS)),                     # integer ids (scripts, discovery)
+], ids=['string', 'integer'])
+def test_aggregate_matches_baseline(tmp_path, scenario_ids):
+    csv_path = tmp_path / 'run.csv'
+    make_run(scenario_ids).to_csv(csv_path, index=False)
+
+    assert_stats_match(aggregate_results(str(csv_path)), baseline_aggregate(csv_path))
+
+
+def test_race_without_winner(tmp_path):
+    # A race where no agent is flagged as the winner (e.g. every car retired)
+    csv_path = tmp_path / 'run.csv'
+    make_run(list(range(NUM_SCENARIOS)), winners=['Alpha', None, 'Bravo', 'Alpha']).to_csv(csv_path, index=False)
+
+    stats = aggregate_results(str(csv_path))
+    assert_stats_match(stats, baseline_aggregate(csv_path))
+    assert sum(agent['wins'] for agent in stats.values()) == NUM_SCENARIOS - 1
+
+
+def test_summarize_loaded_run_is_unmodified_by_callers(tmp_path):
+    csv_path = tmp_path / 'run.csv'
+    make_run(list(range(NUM_SCENARIOS))).to_csv(csv_path, index=False)
+
+    first = aggregate_results(str(csv_path))
+    first['Alpha']['wins'] = -1
+    assert aggregate_results(str(csv_path)) == summarize_run(load_run(str(csv_path)))
+
+
+def test_parquet_run_matches_csv_run(tmp_path):
+    # Runs are written as Parquet by api/runner.py; older runs are CSV
+    run = make_run([f"S{i:04d}_0" for i in range(NUM_SCENARIOS)])
+    csv_path = tmp_path / 'run.csv'
+    parquet_path = tmp_path / 'run.parquet'
+    run.to_csv(csv_path, index=False)
+    run.to_parquet(parquet_path, engine='pyarrow', compression='zstd', index=False)
+
+    assert aggregate_results(str(parquet_path)) == aggregate_results(str(csv_path))
+    assert_stats_match(aggregate_results(str(parquet_path)), baseline_aggregate(csv_path))
@@ -0,0 +1,151 @@
+"""
+Equivalence tests for decision-point aggregation (api/gemini_game_advisor.py).
+
+The NumPy aggregation behind analyze_decision_point is compared against the
+original per-strategy pandas loop.
+
+Usage:
+    pytest tests/test_decision_aggregation.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.gemini_game_advisor import GameAdvisor
+
+STRATEGY_PARAMS = [
+    {'energy_deployment': 85, 'tire_management': 60},
+    {'energy_deployment': 65, 'tire_management': 80},
+    {'energy_deployment': 45, 'tire_management': 90},
+    {'energy_deployment': 70, 'tire_management': 70},  # never simulated
+]
+
+
+def baseline_aggregate(sim_results, strategy_params):
+    """The original per-strategy loop _aggregate_strategy_results replaced"""
+    aggregated = []
+    for strategy_id in range(len(strategy_params)):
+        strategy_data = sim_results[sim_results['strategy_id'] == strategy_id].copy()
+        if len(strategy_data) == 0:
+            continue
+
+        total_sims = len(strategy_data)
+        wins = int(strategy_data['won'].sum()) if 'won' in strategy_data.columns else 0
+
+        if 'final_position' in strategy_data.columns:
+            p1_count = wins
+            p2_3_count = len(strategy_data[strategy_data['final_position'].isin([2, 3])])
+            p4_10_count = len(strategy_data[
+                (strategy_data['final_position'] >= 4) &
+                (strategy_data['final_position'] <= 10)
+            ])
+            outside_points = total_sims - p1_count - p2_3_count - p4_10_count
+            avg_position = float(strategy_data['final_position'].mean())
+        else:
+            p1_count = wins
+            p2_3_count = 0
+            p4_10_count = 0
+            outside_points = total_sims - wins
+            avg_position = 5.0
+
+        avg_final_battery = 50.0
+        if 'battery_soc' in strategy_data.columns:
+            if 'sim_run_id' in strategy_data.columns:
+                final_batteries = strategy_data.groupby('sim_run_id')['battery_soc'].last()
+                avg_final_battery = float(final_batteries.mean())
+            else:
+                avg_final_battery = float(strategy_data['battery_soc'].tail(total_sims).mean())
+
+        aggregated.append({
+            'strategy_id': strategy_id,
+            'params': strategy_params[strategy_id],
+            'win_rate': (wins / total_sims * 100) if total_sims > 0 else 0.0,
+            'avg_position': avg_position,
+            'position_distribution': {
+                'wins': p1_count,
+                'podium': p2_3_count,
+                'points': p4_10_count,
+                'outside_points': outside_points
+            },
+            'avg_final_battery': avg_final_battery,
+            'dnf_rate': 0.0
+        })
+    return aggregated
+
+
+def make_sim_results(no_winners=False, shuffle=True):
+    """Three strategies x 30 sims x 3 rows per sim, in emitted or shuffled order"""
+    rng = np.random.default_rng(11)
+    n = 3 * 30 * 3
+    position = rng.integers(1, 21, n)
+    df = pd.DataFrame({
+        'strategy_id': np.repeat([0, 1, 2], 90),
+        'sim_run_id': np.repeat(np.arange(90), 3) % 45,  # ids repeat across strategies
+        'final_position': position,
+        'won': np.zeros(n, dtype=bool) if no_winners else position == 1,
+        'battery_soc': rng.uniform(0, 100, n).round(2),
+    })
+    if not shuffle:
+        return df
+    return df.sample(frac=1, random_state=3).reset_index(drop=True)
+
+
+@pytest.fixture
+def advisor(monkeypatch):
+    monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+    return GameAdvisor(api_key=None)
+
+
+def assert_aggregates_match(actual, expected):
+    assert [s['strategy_id'] for s in actual] == [s['strategy_id'] for s in expected]
+    for got, want in zip(actual, expected):
+        assert got['params'] == want['params']
+        assert got['position_distribution'] == want['position_distribution']
+        for field in ('win_rate', 'avg_position', 'avg_final_battery', 'dnf_rate'):
+            assert got[field] == pytest.approx(want[field]), (want['strategy_id'], field)
+
+
+@pytest.mark.parametrize('drop', [
+    (),
+    ('sim_run_id',),
+    ('final_position',),
+    ('battery_soc',),
+    ('won',),
+], ids=['all-columns', 'no-sim-run-id', 'no-position', 'no-battery', 'no-won'])
+def test_matches_baseline(advisor, drop):
+    sim_results = make_sim_results().drop(columns=list(drop))
+    assert_aggregates_match(
+        advisor._aggregate_strategy_results(sim_results, STRATEGY_PARAMS),
+        baseline_aggregate(sim_results, STRATEGY_PARAMS)
+    )
+
+
+@pytest.mark.parametrize('shuffle', [False, True], ids=['emitted-order', 'shuffled'])
+def test_final_battery_is_last_row_of_each_run(advisor, shuffle):
+    sim_results = make_sim_results(shuffle=shuffle)
+    assert_aggregates_match(
+        advisor._aggregate_strategy_results(sim_results, STRATEGY_PARAMS),
+        baseline_aggregate(sim_results, STRATEGY_PARAMS)
+    )
+
+
+def test_no_winners(advisor):
+    sim_results = make_sim_results(no_winners=True)
+    actual = advisor._aggregate_strategy_results(sim_results, STRATEGY_PARAMS)
+    assert_aggregates_match(actual, baseline_aggregate(sim_results, STRATEGY_PARAMS))
+    assert all(s['win_rate'] == 0.0 for s in actual)
+
+
+def test_array_entry_point_matches_dataframe(advisor):
+    sim_results = make_sim_results()
+    expected = advisor._aggregate_strategy_results(sim_results, STRATEGY_PARAMS)
+    actual = advisor._aggregate_strategy_results_np(
+        STRATEGY_PARAMS,
+        sim_results['strategy_id'].to_numpy(),
+        final_position=sim_results['final_position'].to_numpy(),
+        won=sim_results['won'].to_numpy(),
+        battery_soc=sim_results['battery_soc'].to_numpy(),
+        sim_run_id=sim_results['sim_run_id'].to_numpy()
+    )
+    assert_aggregates_match(actual, expected)
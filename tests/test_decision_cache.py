@@ -0,0 +1,105 @@
+"""
+Tests for the GameAdvisor decision response cache (api/gemini_game_advisor.py).
+
+Usage:
+    pytest tests/test_decision_cache.py
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.gemini_game_advisor import GameAdvisor
+
+ANSWER = json.dumps({
+    "recommended": [
+        {"strategy_id": 0, "rationale": "Push now", "confidence": 0.8},
+        {"strategy_id": 1, "rationale": "Hold pace", "confidence": 0.6}
+    ],
+    "avoid": {"strategy_id": 2, "rationale": "Too passive", "risk": "Loses places"}
+})
+
+STRATEGY_PARAMS = [
+    {'energy_deployment': 85, 'tire_management': 60},
+    {'energy_deployment': 65, 'tire_management': 80},
+    {'energy_deployment': 45, 'tire_management': 90},
+]
+
+RACE_CONTEXT = {
+    'event_type': 'RAIN_START', 'lap': 10, 'position': 4,
+    'battery_soc': 62.0, 'tire_life': 71.0, 'fuel_remaining': 40.0
+}
+
+
+class FakeModel:
+    """Counts Gemini calls and always returns the same valid answer"""
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        return type('Response', (), {'text': ANSWER})()
+
+
+def make_sim_results():
+    rng = np.random.default_rng(5)
+    n = 3 * 20
+    position = rng.integers(1, 11, n)
+    return pd.DataFrame({
+        'strategy_id': np.repeat([0, 1, 2], 20),
+        'sim_run_id': np.tile(np.arange(20), 3),
+        'final_position': position,
+        'won': position == 1,
+        'battery_soc': rng.uniform(0, 100, n).round(1),
+    })
+
+
+@pytest.fixture
+def advisor(monkeypatch):
+    monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+    advisor = GameAdvisor(api_key=None)
+    advisor.model = FakeModel()
+    advisor.gemini_available = True
+    return advisor
+
+
+def test_replayed_decision_is_served_from_cache(advisor):
+    sim_results = make_sim_results()
+    first = advisor.analyze_decision_point(sim_results, RACE_CONTEXT, STRATEGY_PARAMS)
+    second = advisor.analyze_decision_point(sim_results, RACE_CONTEXT, STRATEGY_PARAMS)
+
+    assert advisor.model.calls == 1
+    assert (advisor.cache_hits, advisor.cache_misses) == (1, 1)
+    assert second['recommended'] == first['recommended']
+    assert not second['used_fallback']
+
+
+def test_different_strategy_params_miss_cache(advisor):
+    sim_results = make_sim_results()
+    advisor.analyze_decision_point(sim_results, RACE_CONTEXT, STRATEGY_PARAMS)
+
+    # Same results and win rates, but a different setting for one strategy
+    other_params = [dict(STRATEGY_PARAMS[0], energy_deployment=95)] + STRATEGY_PARAMS[1:]
+    recommendations = advisor.analyze_decision_point(sim_results, RACE_CONTEXT, other_params)
+
+    assert advisor.model.calls == 2
+    assert advisor.cache_hits == 0
+    assert recommendations['recommended'][0]['strategy_params'] == other_params[0]
+
+
+def test_different_stats_or_lap_miss_cache(advisor):
+    sim_results = make_sim_results()
+    advisor.analyze_decision_point(sim_results, RACE_CONTEXT, STRATEGY_PARAMS)
+
+    # Strategy 2's average finish changes while its win rate does not
+    slower = sim_results.copy()
+    slower.loc[(slower['strategy_id'] == 2) & ~slower['won'], 'final_position'] = 10
+    advisor.analyze_decision_point(slower, RACE_CONTEXT, STRATEGY_PARAMS)
+
+    # Next lap (same 3-lap bucket as before)
+    advisor.analyze_decision_point(sim_results, dict(RACE_CONTEXT, lap=11), STRATEGY_PARAMS)
+
+    assert advisor.model.calls == 3
+    assert advisor.cache_hits == 0
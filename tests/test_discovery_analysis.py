@@ -0,0 +1,120 @@
+"""
+Equivalence tests for the discovery analysis pass (api/gemini_discovery.py).
+
+StatsAccumulator's performance groups are compared against the original
+pandas analysis on a small run where win rates tie across the cutoffs.
+
+Usage:
+    pytest tests/test_discovery_analysis.py
+"""
+
+import pandas as pd
+import pyarrow.csv as pacsv
+import pytest
+
+pytest.importorskip("google.generativeai")
+
+from api.gemini_discovery import StatsAccumulator, DISCOVERY_COLUMN_TYPES
+
+PROFILE_COLUMNS = [
+    'energy_deployment', 'tire_management', 'fuel_strategy',
+    'ers_mode', 'overtake_aggression', 'defense_intensity'
+]
+
+# Listed out of name order, so first appearance differs from sorted order
+AGENTS = ['Zeta', 'Mike', 'Echo', 'Alpha', 'Kilo', 'Bravo', 'Delta', 'Golf']
+# Zeta wins twice, Alpha and Mike tie on one win each across the top cutoff,
+# and the five winless agents tie across the bottom cutoff
+WINNERS = ['Zeta', 'Mike', 'Zeta', 'Alpha']
+
+
+def baseline_groups(csv_path):
+    """Performance groups as the original pandas analysis built them"""
+    df = pd.read_csv(csv_path)
+    final_laps = df.groupby(['scenario_id', 'agent']).tail(1)
+    agent_stats = final_laps.groupby('agent').agg({
+        'won': 'sum',
+        'final_position': 'mean',
+        'lap_time': 'mean',
+        **{col: 'mean' for col in PROFILE_COLUMNS}
+    }).round(2)
+
+    num_agents = len(agent_stats)
+    top_cutoff = int(num_agents * 0.25)
+    bottom_cutoff = int(num_agents * 0.75)
+    agent_stats['win_rate'] = agent_stats['won'] / final_laps['scenario_id'].nunique()
+    # The original used the default (unstable) sort; ties are pinned to
+    # agent-name order here, which is what the accumulator guarantees
+    agent_stats = agent_stats.sort_values('win_rate', ascending=False, kind='stable')
+
+    def group(stats):
+        return {
+            'agents': stats.index.tolist(),
+            'avg_win_rate': float(stats['win_rate'].mean()),
+            'avg_position': float(stats['final_position'].mean()),
+            'strategy_profile': {col: float(stats[col].mean()) for col in PROFILE_COLUMNS}
+        }
+
+    return {
+        'top_25_percent': group(agent_stats.head(top_cutoff)),
+        'bottom_25_percent': group(agent_stats.tail(num_agents - bottom_cutoff))
+    }
+
+
+def make_run():
+    """Two laps per race; final-lap strategy values vary per race"""
+    rows = []
+    for scenario_id, winner in enumerate(WINNERS):
+        for a, agent in enumerate(AGENTS):
+            for lap in (1, 2):
+                rows.append({
+                    'scenario_id': scenario_id,
+                    'agent': agent,
+                    'lap': lap,
+                    'won': agent == winner,
+                    'final_position': 1 if agent == winner else 2 + (a + scenario_id) % 7,
+                    'lap_time': 90.0 + a * 0.1,
+                    'battery_soc': 50.0,
+                    'tire_life': 60.0,
+                    **{col: 40.0 + a * 2.5 + i + scenario_id * 0.75
+                       for i, col in enumerate(PROFILE_COLUMNS)}
+                })
+    return pd.DataFrame(rows)
+
+
+def analyze(csv_path):
+    table = pacsv.read_csv(
+        csv_path,
+        convert_options=pacsv.ConvertOptions(
+            include_columns=list(DISCOVERY_COLUMN_TYPES),
+            column_types=DISCOVERY_COLUMN_TYPES
+        )
+    )
+    accumulator = StatsAccumulator()
+    accumulator.update(table.to_pandas())
+    return accumulator.finalize()
+
+
+@pytest.mark.parametrize('row_order', ['emitted', 'reversed'])
+def test_tied_win_rates_split_like_baseline(tmp_path, row_order):
+    run = make_run()
+    if row_order == 'reversed':
+        # Agents first appear in a different order; the groups must not change
+        run = run.iloc[::-1]
+    csv_path = tmp_path / 'discovery_runs.csv'
+    run.to_csv(csv_path, index=False)
+
+    groups = analyze(csv_path)['performance_groups']
+    expected = baseline_groups(csv_path)
+
+    for name in ('top_25_percent', 'bottom_25_percent'):
+        assert groups[name]['agents'] == expected[name]['agents'], name
+        assert groups[name]['avg_win_rate'] == pytest.approx(expected[name]['avg_win_rate'])
+        # Per-agent means are rounded to 2 decimals before the group mean
+        assert groups[name]['avg_position'] == pytest.approx(expected[name]['avg_position'], abs=1e-9)
+        for col in PROFILE_COLUMNS:
+            assert groups[name]['strategy_profile'][col] == pytest.approx(
+                expected[name]['strategy_profile'][col], abs=1e-9
+            ), (name, col)
+    assert groups['top_25_percent']['agents'] == ['Zeta', 'Alpha']
+    assert groups['bottom_25_percent']['agents'] == ['Golf', 'Kilo']
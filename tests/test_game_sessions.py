@@ -0,0 +1,85 @@
+"""
+Tests for the sharded session store (api/game_sessions.py).
+
+Usage:
+    pytest tests/test_game_sessions.py
+"""
+
+import time
+
+import pytest
+
+import api.game_sessions as game_sessions
+from api.game_sessions import GameSessionManager, NUM_SHARDS, HEAP_COMPACT_SLACK
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to"""
+    def __init__(self):
+        # New GameStates stamp last_updated with the real clock, so start there
+        self.now = time.monotonic()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(game_sessions.time, 'monotonic', clock)
+    return clock
+
+
+def test_sessions_behave_like_one_dict(clock):
+    manager = GameSessionManager()
+    ids = [manager.create_session(player_name=f"P{i}") for i in range(40)]
+
+    assert manager.get_active_session_count() == len(ids)
+    for i, session_id in enumerate(ids):
+        state = manager.get_session(session_id)
+        assert state.session_id == session_id
+        assert state.player_name == f"P{i}"
+
+    manager.delete_session(ids[0])
+    manager.delete_session('missing')
+    assert manager.get_session(ids[0]) is None
+    assert manager.get_active_session_count() == len(ids) - 1
+
+
+def test_cleanup_expires_only_idle_sessions(clock):
+    manager = GameSessionManager(max_session_age_minutes=1)
+    idle = manager.create_session()
+    active = manager.create_session()
+    deleted = manager.create_session()
+    manager.delete_session(deleted)
+
+    clock.now += 45
+    manager.update_session(active, manager.get_session(active))
+    clock.now += 30
+
+    assert manager.cleanup_old_sessions() == 1
+    assert manager.get_session(idle) is None
+    assert manager.get_session(active) is not None
+
+    clock.now += 60
+    assert manager.cleanup_old_sessions() == 1
+    assert manager.get_active_session_count() == 0
+
+
+def test_expiry_heap_stays_bounded_for_active_sessions(clock):
+    manager = GameSessionManager(max_session_age_minutes=1)
+    ids = [manager.create_session() for _ in range(3 * NUM_SHARDS)]
+
+    # A long race: every session is touched once per lap, well within the age limit
+    for _ in range(500):
+        clock.now += 0.1
+        for session_id in ids:
+            manager.update_session(session_id, manager.get_session(session_id))
+
+    for heap, sessions in zip(manager._expiry_heaps, manager._shards):
+        assert len(heap) <= 2 * len(sessions) + HEAP_COMPACT_SLACK + 1
+
+    # Rebuilt heaps still expire every session once it goes idle
+    clock.now += 61
+    assert manager.cleanup_old_sessions() == len(ids)
+    assert manager.get_active_session_count() == 0
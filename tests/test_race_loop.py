@@ -0,0 +1,123 @@
+"""
+Timing tests for the WebSocket race loop (api/main.py run_race_loop).
+
+The loop sleeps until its next broadcast or lap is due; these tests drive it
+on a virtual clock to check every lap boundary is processed exactly once.
+
+Usage:
+    pytest tests/test_race_loop.py
+"""
+
+import asyncio
+
+import orjson
+import pytest
+
+import api.main as main
+from api.game_sessions import session_manager
+
+_real_sleep = asyncio.sleep
+
+
+class VirtualClock:
+    """perf_counter/asyncio.sleep stand-ins: sleeping advances time, plus scheduler lateness"""
+    def __init__(self, lateness):
+        self.now = 100.0
+        self.lateness = lateness
+        self.sleeps = []
+
+    def perf_counter(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay + self.lateness
+        await _real_sleep(0)
+
+
+class FakeWebSocket:
+    def __init__(self, clock):
+        self.clock = clock
+        self.frames = []
+
+    async def send_text(self, text):
+        self.frames.append((self.clock.now, orjson.loads(text)))
+
+
+class FakeOrchestrator:
+    """Records when laps advance; never triggers a decision point"""
+    pre_compute_started = True
+    pre_computed_decision = None
+
+    def __init__(self, game_state, clock, lap_time_multiplier):
+        self.game_state = game_state
+        self.clock = clock
+        self.lap_time_multiplier = lap_time_multiplier
+        self.lap_times = []
+
+    def advance_lap(self):
+        self.game_state.current_lap += 1
+        self.lap_times.append(self.clock.now)
+        return {
+            'race_complete': self.game_state.current_lap >= self.game_state.total_laps,
+            'final_position': 1
+        }
+
+    def check_for_decision_point(self):
+        return {'triggered': False}
+
+
+def run_race(monkeypatch, lap_time_multiplier, lateness, total_laps=12):
+    clock = VirtualClock(lateness)
+    monkeypatch.setattr(main.time, 'perf_counter', clock.perf_counter)
+    monkeypatch.setattr(main.asyncio, 'sleep', clock.sleep)
+
+    session_id = session_manager.create_session(total_laps=total_laps)
+    game_state = session_manager.get_session(session_id)
+    orchestrator = FakeOrchestrator(game_state, clock, lap_time_multiplier)
+    websocket = FakeWebSocket(clock)
+
+    async def race():
+        # Created by the WebSocket handler on START_RACE
+        game_state.pause_event = asyncio.Event()
+        await main.run_race_loop(websocket, orchestrator, game_state)
+
+    try:
+        asyncio.run(race())
+    finally:
+        session_manager.delete_session(session_id)
+    return clock, orchestrator, websocket
+
+
+# Lap lengths that are and are not whole multiples of the 0.1s broadcast
+# interval, with and without the event loop waking up late
+@pytest.mark.parametrize('lap_time_multiplier', [300.0, 360.0, 257.0])
+@pytest.mark.parametrize('lateness', [0.0, 0.0007, 0.013])
+def test_each_lap_boundary_is_processed_once(monkeypatch, lap_time_multiplier, lateness):
+    lap_time = 90.0 / lap_time_multiplier
+    clock, orchestrator, websocket = run_race(monkeypatch, lap_time_multiplier, lateness)
+
+    # Lap 1 is advanced on entry, then one advance per lap boundary
+    assert len(orchestrator.lap_times) == 12
+    gaps = [b - a for a, b in zip(orchestrator.lap_times[1:], orchestrator.lap_times[2:])]
+    for gap in gaps:
+        # Never early (a boundary counted twice), and late by at most one
+        # floor sleep plus the loop's lateness
+        assert gap >= lap_time - 1e-9
+        assert gap <= lap_time + 0.002 + lateness + 1e-9
+
+    # Broadcasts see the lap advance by at most one between frames
+    laps = [frame['lap'] for _, frame in websocket.frames if frame['type'] == 'LAP_UPDATE']
+    assert laps, "no LAP_UPDATE frames were sent"
+    assert all(0 <= b - a <= 1 for a, b in zip(laps, laps[1:]))
+    assert websocket.frames[-1][1]['type'] == 'RACE_COMPLETE'
+
+
+def test_loop_sleeps_until_next_event(monkeypatch):
+    clock, orchestrator, websocket = run_race(monkeypatch, 300.0, 0.0, total_laps=4)
+
+    # Every sleep is bounded by the 0.002 floor and the 0.1s broadcast interval
+    assert all(0.002 <= delay <= 0.1 + 1e-9 for delay in clock.sleeps)
+    # ~10 Hz broadcasts plus lap wake-ups, not a busy loop
+    race_time = orchestrator.lap_times[-1] - orchestrator.lap_times[0]
+    assert len(clock.sleeps) <= 2 * (race_time / 0.1 + len(orchestrator.lap_times)) + 5
@@ -0,0 +1,122 @@
+"""
+Tests for the memoized /recommend rule matching (api/recommend.py).
+
+Usage:
+    pytest tests/test_recommend.py
+"""
+
+import json
+import os
+
+import pytest
+
+from api.recommend import get_recommendations_fast, safe_eval_condition
+
+PLAYBOOK = {
+    'rules': [
+        {
+            'rule': 'Low Battery Conservation',
+            'condition': 'battery_soc < 30',
+            'action': {'energy_deployment': 40, 'ers_mode': 30},
+            'confidence': 0.8,
+            'rationale': 'Save energy',
+        },
+        {
+            'rule': 'Late Race Push',
+            'condition': 'lap > 50 and tire_life > 40',
+            'action': {'energy_deployment': 90, 'overtake_aggression': 85},
+            'confidence': 0.7,
+            'rationale': 'Push to the flag',
+        },
+    ]
+}
+
+STATES = [
+    {'lap': 10, 'battery_soc': 25.0, 'tire_life': 80.0, 'fuel_remaining': 60.0, 'position': 3},
+    {'lap': 55, 'battery_soc': 25.0, 'tire_life': 50.0, 'fuel_remaining': 20.0, 'position': 2},
+    {'lap': 55, 'battery_soc': 75.0, 'tire_life': 20.0, 'fuel_remaining': 20.0, 'position': 1},
+]
+
+
+def baseline_recommendations(state):
+    """The uncached rule walk get_recommendations_fast replaced (minus the seed)"""
+    recommendations = []
+    conditions_evaluated = []
+    for rule in PLAYBOOK['rules']:
+        matched = safe_eval_condition(rule['condition'], state)
+        conditions_evaluated.append({"condition": rule['condition'], "matched": matched})
+        if matched:
+            recommendations.append({
+                'rule': rule['rule'],
+                'action': rule['action'],
+                'confidence': rule['confidence'],
+                'rationale': rule['rationale']
+            })
+    return recommendations, conditions_evaluated
+
+
+@pytest.fixture
+def playbook_dir(tmp_path, monkeypatch):
+    os.makedirs(tmp_path / 'data')
+    with open(tmp_path / 'data' / 'playbook.json', 'w') as f:
+        json.dump(PLAYBOOK, f)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.parametrize('state', STATES[:2])
+def test_matches_baseline(playbook_dir, state):
+    expected_recs, expected_conditions = baseline_recommendations(state)
+
+    # Twice: the second call is served from the cache
+    for _ in range(2):
+        recommendations, conditions_evaluated, seed = get_recommendations_fast(state)
+        assert recommendations == expected_recs
+        assert conditions_evaluated == expected_conditions
+        assert 1000 <= seed <= 9999
+
+
+def test_no_match_uses_default(playbook_dir):
+    recommendations, _, _ = get_recommendations_fast(STATES[2])
+    assert [rec['rule'] for rec in recommendations] == ['Balanced Default']
+
+
+def test_cached_results_are_not_shared(playbook_dir):
+    recommendations, conditions_evaluated, _ = get_recommendations_fast(STATES[0])
+    recommendations[0]['action']['energy_deployment'] = 0
+    recommendations.append({'rule': 'Injected'})
+    conditions_evaluated.clear()
+
+    recommendations, conditions_evaluated, _ = get_recommendations_fast(STATES[0])
+    assert recommendations == baseline_recommendations(STATES[0])[0]
+    assert len(conditions_evaluated) == len(PLAYBOOK['rules'])
+
+
+def test_seed_is_drawn_per_call(playbook_dir):
+    seeds = {get_recommendations_fast(STATES[0])[2] for _ in range(50)}
+    assert len(seeds) > 1
+
+
+def test_missing_playbook_is_404(tmp_path, monkeypatch):
+    from fastapi import HTTPException
+
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(HTTPException) as exc_info:
+        get_recommendations_fast(STATES[0])
+    assert exc_info.value.status_code == 404
+
+
+@pytest.mark.parametrize('field, value, rule', [
+    ('battery_soc', 29.996, 'Low Battery Conservation'),  # battery_soc < 30
+    ('tire_life', 40.04, 'Late Race Push'),               # tire_life > 40
+], ids=['battery-just-under', 'tires-just-over'])
+def test_conditions_see_exact_state_at_thresholds(playbook_dir, field, value, rule):
+    state = dict(STATES[1], battery_soc=75.0)
+    state[field] = value
+    recommendations, conditions_evaluated, _ = get_recommendations_fast(state)
+    assert rule in [rec['rule'] for rec in recommendations]
+    assert (recommendations, conditions_evaluated) == baseline_recommendations(state)
+
+    # A state on the far side of the threshold is not served the cached match
+    state[field] = round(value)
+    assert rule not in [rec['rule'] for rec in get_recommendations_fast(state)[0]]
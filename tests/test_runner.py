@@ -0,0 +1,33 @@
+"""
+Tests for the simulation worker functions (api/runner.py).
+
+Usage:
+    pytest tests/test_runner.py
+"""
+
+import pandas as pd
+
+import sim.engine
+from api.runner import race_winner
+
+
+def fake_race(won):
+    """simulate_race stand-in returning two laps for each agent"""
+    def simulate_race(scenario, agents):
+        return pd.DataFrame({
+            'agent': ['Alpha', 'Alpha', 'Bravo', 'Bravo'],
+            'lap': [1, 2, 1, 2],
+            'won': won,
+        })
+    return simulate_race
+
+
+def test_race_winner_names_flagged_agent(monkeypatch):
+    monkeypatch.setattr(sim.engine, 'simulate_race', fake_race([False, False, True, True]))
+    assert race_winner({}, []) == 'Bravo'
+
+
+def test_race_winner_without_winner(monkeypatch):
+    # argmax of an all-False mask is 0, which would credit the first agent
+    monkeypatch.setattr(sim.engine, 'simulate_race', fake_race([False] * 4))
+    assert race_winner({}, []) is None